@@ -1,75 +1,22 @@
-import logging
-import functools
-import logging
-import functools
+import os
 import time
 import utils.file_ops as file_ops
 from pathlib import Path
 import setup.logging_setup as logging_setup  # Function to initialise logger
-from setup import config_setup  # Interfaces with config.ini functionalities
+from utils import decorators
 
-from utils.cache_utils import cache_function
 from processes import process_step_mockup
 
-# Dynamically obtain the logger name from the script name (without extension).
-config = config_setup.get_prod_config()
+# Logger named after the script (without extension), writing to logs/<script name>.log
 script_name: str = Path(__file__).stem
+logger, logfile_path = logging_setup.get_step_logger(__file__)
 
-# Build the absolute path for the log file
-logs_dir: Path = logging_setup.configure_logs_directory()
-logfile_path: Path = Path(logs_dir, f"{script_name}.log")
 
-# Get the logger instance
-logger = logging_setup.get_logger(
-    logger_name=script_name,
-    logfile_name=logfile_path,
-    console_level=logging.INFO,
-    file_level=logging.DEBUG
-)
-
-
-def log_exceptions_with_args(func):
-    """
-    Provides a decorator to log exceptions raised by the wrapped functions,
-    including their arguments and traceback information. Ensures errors are
-    documented for debugging while re-raising the exceptions for further handling.
-
-    Parameters
-    ----------
-    func : callable
-        The function to be wrapped by the decorator.
-
-    Returns
-    -------
-    callable
-        The wrapped function that includes logging functionality for exceptions.
-
-    Raises
-    ------
-    Exception
-        Re-raises any exception encountered while executing the wrapped function.
-    """
-
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except Exception as e:
-            # Log the error with function name and parameter details.
-            logger.error(
-                "Exception in function '%s' with args: %s, kwargs: %s",
-                func.__name__,
-                args,
-                kwargs,
-                exc_info=True  # This logs the traceback as well.
-            )
-            raise  # Re-raise the exception after logging.
-
-    return wrapper
+# Shared decorator, logging exceptions of the wrapped functions to this module's logger
+log_exceptions_with_args = decorators.log_exceptions_with_args(logger)
 
 
 # Placeholder Python script
-@cache_function(maxsize=256)
 @log_exceptions_with_args
 def main(file_path: str) -> bool:
     """
@@ -89,25 +36,26 @@ def main(file_path: str) -> bool:
         Any exceptions raised during the file processing or file moving operations
         are logged by the @log_exceptions_with_args decorator.
     """
-    file_path = Path(file_path).resolve()
-    processed_dir = file_path.parent.parent / "processed/"
+    # Resolve once and pass the plain string on, instead of re-wrapping it in Path objects
+    file_path = os.path.realpath(file_path)
+    processed_dir = os.path.join(os.path.dirname(os.path.dirname(file_path)), "processed")
 
-    logger.info(f"process {script_name} for {file_path} started, output in {processed_dir}")
+    logger.info("process %s for %s started, output in %s", script_name, file_path, processed_dir)
 
     # code to process file here:
     # ...
     try:
         start_time = time.time()
-        file_processed_path = process_step_mockup.main(str(file_path))
+        file_processed_path = process_step_mockup.main(file_path)
         duration = time.time() - start_time
-        logger.info(f"process_step_mockup.main took {duration:.2f} seconds to complete.")
+        logger.info("process_step_mockup.main took %.2f seconds to complete.", duration)
     except Exception as error:
-        logger.error(f"Error during process_step_mockup.main: {error}")
+        logger.error("Error during process_step_mockup.main: %s", error)
         return False
 
     # Move processed file to the process_dir, if successful
-    file_ops.move_file(str(Path(file_processed_path)), str(processed_dir))
-    logger.info(f"process {script_name} completed and moving to {processed_dir}")
+    file_ops.move_file(file_processed_path, processed_dir)
+    logger.info("process %s completed and moving to %s", script_name, processed_dir)
     return True
 
 
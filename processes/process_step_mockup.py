@@ -1,78 +1,21 @@
-import logging
-import functools
-
 from pathlib import Path
 import setup.logging_setup as logging_setup  # Function to initialise logger
-from setup import config_setup  # Interfaces with config.ini functionalities
+from utils import decorators
+import utils.file_ops as file_ops
 import random
 import time
 
-from utils.cache_utils import cache_function
 
-# Dynamically obtain the logger name from the script name (without extension).
-config = config_setup.get_prod_config()
+# Logger named after the script (without extension), writing to logs/<script name>.log
 script_name: str = Path(__file__).stem
+logger, logfile_path = logging_setup.get_step_logger(__file__)
 
-# Build the absolute path for the log file
-logs_dir: Path = logging_setup.configure_logs_directory()
-logfile_path: Path = Path(logs_dir, f"{script_name}.log")
-
-# Get the logger instance
-logger = logging_setup.get_logger(
-    logger_name=script_name,
-    logfile_name=logfile_path,
-    console_level=logging.INFO,
-    file_level=logging.DEBUG
-)
-
-
-def log_exceptions_with_args(func):
-    """
-    A decorator that wraps a function to log exceptions along with its arguments.
-
-    The purpose of this decorator is to intercept exceptions raised by the wrapped
-    function, log the exception details including the function name, arguments, and
-    keyword arguments, and then re-raise the exception to allow for further handling
-    by the caller. The logged details also include the traceback information for
-    improved debugging.
-
-    Attributes:
-        None
-
-    Args:
-        func: Callable
-            The function to be wrapped by the decorator.
-
-    Returns:
-        Callable:
-            The wrapper function that provides the additional logging
-            functionality.
-
-    Raises:
-        Exception:
-            Propagates any exceptions raised by the wrapped function after logging.
-    """
-
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except Exception as e:
-            # Log the error with function name and parameter details.
-            logger.error(
-                "Exception in function '%s' with args: %s, kwargs: %s",
-                func.__name__,
-                args,
-                kwargs,
-                exc_info=True  # This logs the traceback as well.
-            )
-            raise  # Re-raise the exception after logging.
 
-    return wrapper
+# Shared decorator, logging exceptions of the wrapped functions to this module's logger
+log_exceptions_with_args = decorators.log_exceptions_with_args(logger)
 
 
 # Placeholder Python script
-@cache_function(maxsize=256)
 @log_exceptions_with_args
 def main(file_path: str):
     """
@@ -95,21 +38,20 @@ def main(file_path: str):
     # For testing purpose, raise an error about every 10th time the function runs
     # Trigger an error with roughly a 1-in-10 chance
     if random.random() < 0.1:
-        logger.error(f"Random error triggered (about 1 in 10 chance).{file_path}")
+        logger.error("Random error triggered (about 1 in 10 chance).%s", file_path)
         raise RuntimeError(f"Random error triggered (about 1 in 10 chance).{file_path}")
 
     # code to process file here:
     # ...
-    logger.debug(f"processing file {file_path} ")
+    logger.debug("processing file %s ", file_path)
     temp_var: int = random.randint(0, 2)
-    logger.debug(f"Waiting for {temp_var} second(s)")
+    logger.debug("Waiting for %s second(s)", temp_var)
     # Append a line to the file in file_path indicating the process step and wait time.
-    with open(str(file_path), "a", encoding="utf-8") as temp_file:
-        temp_file.write(f"Process step: waited for {temp_var} second(s)\n")
+    file_ops.append_line(str(file_path), f"Process step: waited for {temp_var} second(s)\n")
     time.sleep(float(temp_var))
     # ...
     # finally move processed file to the process_dir of the stage
-    return str(temp_file.name)
+    return str(file_path)
 
 
 if __name__ == "__main__":
@@ -8,8 +8,9 @@ import logging
 # This helps to keep the same logger instance in all functions across the project.
 # all config parameters in [DIRECTORIES] and [FILES] are changed to absolute paths
 
-config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../config.ini"))
-config: configparser.ConfigParser = config_setup.get_config(config_path)
+# The shared, memoized config: config.ini is parsed once per process, and every module calling
+# config_setup.get_prod_config() sees the absolute paths set below
+config: configparser.ConfigParser = config_setup.get_prod_config()
 logger: logging.Logger = logging_setup.init_logger(
     logger_name='example_logger',
     logfile_name='logs\\example.log',
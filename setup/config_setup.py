@@ -1,4 +1,5 @@
 import configparser
+import functools
 from os import path
 
 # If you are working with several branches(e.g. master and development)
@@ -6,9 +7,12 @@ from os import path
 # You can change between them by call in the respective function (e.g. config = config_setup.get_prod_config())
 
 
+@functools.lru_cache(maxsize=1)
 def get_prod_config() -> configparser.ConfigParser:
     """
     reads a config.ini file from the same directory as this file
+    the file is only parsed once per process, all callers share the returned config (do not modify it,
+    only the setup package makes the paths in [DIRECTORIES] and [FILES] absolute when it is imported)
     :return:
     """
     return get_config(path.join(path.dirname(__file__), '../config.ini'))
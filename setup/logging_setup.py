@@ -1,18 +1,22 @@
+import atexit
+import functools
 import logging
 import logging.handlers
+import queue
+import threading
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import configparser
 from setup import config_setup
 
+@functools.lru_cache(maxsize=None)
 def get_logger(logger_name, **kwargs):
     """
     Returns the wanted logger. A new one will be created if a logger with logger_name does not exist.
     Otherwise, the existing logger will be returned.
     It is advised to call get_logger if you need logging abilities in different files.
+    Calls are memoized, so repeated imports of a module do not redo the lookup or the handler setup.
 
     :param logger_name: str
     :param kwargs: all params from init_logger
@@ -25,6 +29,29 @@ def get_logger(logger_name, **kwargs):
         logger = init_logger(logger_name, **kwargs)
     return logger
 
+@functools.lru_cache(maxsize=None)
+def get_step_logger(script_path: str) -> Tuple[logging.Logger, Path]:
+    """
+    Returns the logger of a script together with the path of its log file.
+    The logger is named after the script (without extension) and writes to <logs dir>/<script name>.log.
+    Results are cached per script, so importing a module again does not repeat the setup.
+    use like this:
+
+    logger, logfile_path = logging_setup.get_step_logger(__file__)
+
+    :param script_path: path of the calling script, usually __file__
+    :return: tuple of logger instance and log file path
+    """
+    script_name: str = Path(script_path).stem
+    logfile_path: Path = configure_logs_directory() / f"{script_name}.log"
+    logger = get_logger(
+        logger_name=script_name,
+        logfile_name=logfile_path,
+        console_level=logging.INFO,
+        file_level=logging.DEBUG
+    )
+    return logger, logfile_path
+
 def init_logger(logger_name='default_logger', logfile_name='log.log', console_level=logging.INFO, file_level=logging.DEBUG,
                 mail_handler=False,  mail_level=logging.WARNING,
                 smtp_server='', smtp_port=587, smtp_user='', smtp_password='', error_mail_recipient='', error_mail_subject="[Example]") -> logging.Logger:
@@ -35,7 +62,7 @@ def init_logger(logger_name='default_logger', logfile_name='log.log', console_le
     logger.addHandler(
         get_console_handler(console_level))
     logger.addHandler(
-        get_file_handler(logfile_name, file_level))
+        get_queued_file_handler(logfile_name, file_level))
     if mail_handler:
         error_mail_recipient_list = error_mail_recipient.replace(' ', '').split(',')
         logger.addHandler(
@@ -54,6 +81,114 @@ def get_file_handler(filename, level=logging.DEBUG) -> logging.Handler:
     file_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
     return file_log_handler
 
+# All file writes go through one queue, drained by a single listener thread per process,
+# so threads that log never wait for the disk or for each other's file handler locks.
+# SimpleQueue is implemented in C and needs no task tracking, which the listener does not use.
+# The queue and the listener belong to one process: a forked child gets its own (see _reset_after_fork),
+# worker processes of a multiprocessing pool should use init_worker_process as initializer.
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_file_handlers: Dict[str, logging.Handler] = {}  # log file path -> file handler
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+class _LogFileRouter(logging.Handler):
+    """
+    Used by the queue listener: passes each record to the file handler of the log file it was queued for.
+    """
+
+    def handle(self, record):
+        file_handler = _file_handlers.get(record.logfile_name)
+        if file_handler is not None and record.levelno >= file_handler.level:
+            file_handler.handle(record)
+
+
+class _FileQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records for the listener thread and tags them with the log file they belong to.
+    """
+
+    def __init__(self, logfile_name: str):
+        super().__init__(_log_queue)
+        self.logfile_name = logfile_name
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.logfile_name = self.logfile_name
+        return record
+
+    def enqueue(self, record):
+        # Always the queue of the current process, it is replaced in a forked child
+        _log_queue.put_nowait(record)
+
+
+def _start_listener() -> None:
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = logging.handlers.QueueListener(_log_queue, _LogFileRouter())
+            _listener.start()
+
+
+def _stop_listener() -> None:
+    """
+    Writes out the queued records and stops the listener thread of this process.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _reset_after_fork() -> None:
+    """
+    Runs in the child after a fork. The listener thread of the parent does not exist in the child,
+    so the child gets a new queue (records still queued in the copy belong to the parent)
+    and starts its own listener if the parent had one.
+    """
+    global _log_queue, _listener, _listener_lock
+    had_listener = _listener is not None
+    _log_queue = queue.SimpleQueue()
+    _listener = None
+    _listener_lock = threading.Lock()  # may have been held by another thread of the parent
+    if had_listener:
+        _start_listener()
+
+
+atexit.register(_stop_listener)  # flushes the queue on shutdown
+if hasattr(os, "register_at_fork"):  # not available on Windows, which only spawns
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def init_worker_process() -> None:
+    """
+    Initializer for the worker processes of a multiprocessing pool. Starts the listener of the
+    worker right away and flushes it when the worker ends: multiprocessing ends forked workers
+    without running atexit handlers, so a multiprocessing finalizer is registered instead.
+    """
+    from multiprocessing import util
+    _start_listener()
+    util.Finalize(None, _stop_listener, exitpriority=0)
+
+
+def get_queued_file_handler(filename, level=logging.DEBUG) -> logging.Handler:
+    """
+    Returns a handler which queues records for the file filename. The actual file handler
+    (see get_file_handler) is run by the process wide listener thread.
+
+    :param filename: path of the log file
+    :param level: minimum level written to the file
+    :return: queue handler to attach to the logger
+    """
+    logfile_name = str(filename)
+    if logfile_name not in _file_handlers:
+        _file_handlers[logfile_name] = get_file_handler(filename, level)
+    _start_listener()
+    queue_handler = _FileQueueHandler(logfile_name)
+    queue_handler.setLevel(level)
+    return queue_handler
+
 def get_mail_handler(smtp_server, smtp_port, smtp_user, smtp_password, recipient_list, subject, level=logging.WARNING) -> logging.Handler:
     mail_handler = SMTPHandler(smtp_server, smtp_port, smtp_user, smtp_password, recipient_list, subject)
     mail_handler.setLevel(level)
@@ -73,6 +208,11 @@ class SMTPHandler(logging.Handler):
         self.subject = subject
 
     def emit(self, record):
+        # Mail modules are only imported when a mail is sent, most processes never send one
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
         try:
             msg = MIMEMultipart()
             msg['From'] = self.smtp_user
@@ -91,9 +231,12 @@ class SMTPHandler(logging.Handler):
         except Exception:
             self.handleError(record)
 
+@functools.lru_cache(maxsize=1)
 def configure_logs_directory() -> Path:
     """
     Ensures that a logs directory exists and returns its absolute path.
+    The lookup and mkdir run once per process; call configure_logs_directory.cache_clear()
+    if the logs directory is changed at runtime (e.g. in tests).
 
     Returns:
         Path: Absolute path to the logs directory.
@@ -7,11 +7,14 @@ These tests check whether new files are correctly handed off to pipeline_handlin
 without causing unexpected exceptions or failures.
 """
 
+import queue
+import threading
 import pytest
-from unittest.mock import patch
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 from pathlib import Path
 
-from utils.pipeline_file_watcher import PipelineFileWatcher
+from utils.pipeline_file_watcher import PipelineFileWatcher, _NewFileHandler, _detect_new_files, _new_cpu_pool
 
 
 @pytest.mark.parametrize("file_contents", ["", "Some data", "123"])
@@ -55,4 +58,199 @@ def test_process_file_not_found(mock_process_file, tmp_path):
     # Even though the file doesn't exist, _process_file_safely should not raise; it should log instead.
     watcher._process_file_safely(missing_file_path)
 
-    mock_process_file.assert_called_once_with(str(missing_file_path))
\ No newline at end of file
+    mock_process_file.assert_called_once_with(str(missing_file_path))
+
+
+@patch("utils.pipeline_file_watcher.pipeline_handling.process_file")
+def test_process_file_safely_cpu_bound_step(mock_process_file, tmp_path):
+    """
+    Ensures that files of CPU bound steps are submitted to the process pool,
+    while files of other steps are still processed directly.
+
+    Args:
+        mock_process_file (MagicMock): Mocked version of pipeline_handling.process_file.
+        tmp_path (Path): Pytest fixture for creating a temporary directory.
+    """
+    watcher = PipelineFileWatcher()
+    watcher.cpu_bound_steps = {"10_raw_pdf"}
+    watcher.cpu_pool = MagicMock()
+
+    cpu_file: Path = tmp_path / "10_raw_pdf" / "scan.pdf"
+    io_file: Path = tmp_path / "20_text" / "scan.txt"
+
+    watcher._process_file_safely(cpu_file)
+    watcher._process_file_safely(io_file)
+
+    watcher.cpu_pool.submit.assert_called_once_with(mock_process_file, str(cpu_file))
+    mock_process_file.assert_called_once_with(str(io_file))
+
+
+def test_process_file_safely_in_cpu_pool(tmp_path):
+    """
+    Ensures that a file of a CPU bound step is processed in a real (spawned) worker process.
+
+    Args:
+        tmp_path (Path): Pytest fixture for creating a temporary directory.
+    """
+    watcher = PipelineFileWatcher()
+    watcher.cpu_bound_steps = {"10_raw_pdf"}
+    watcher.cpu_pool = _new_cpu_pool()
+
+    # process_file creates the subfolders of the step in the worker, then fails on the missing file
+    missing_file: Path = tmp_path / "10_raw_pdf" / "missing.pdf"
+    try:
+        watcher._process_file_safely(missing_file)
+    finally:
+        watcher.cpu_pool.shutdown(wait=True)
+
+    for subfolder in ("working", "processed", "error"):
+        assert (tmp_path / "10_raw_pdf" / subfolder).is_dir()
+
+
+@patch("utils.pipeline_file_watcher.pipeline_handling.process_file")
+def test_submit_file_once_per_file(mock_process_file, tmp_path):
+    """
+    Ensures that a file is processed in the thread pool, is not submitted again while
+    it is in progress, and frees its slot of the subfolder when done.
+
+    Args:
+        mock_process_file (MagicMock): Mocked version of pipeline_handling.process_file.
+        tmp_path (Path): Pytest fixture for creating a temporary directory.
+    """
+    watcher = PipelineFileWatcher()
+    folder_slots = threading.BoundedSemaphore(1)
+    file_path = str(tmp_path / "test_file.txt")
+    in_progress = {file_path}
+
+    assert watcher._submit_file(file_path, folder_slots, in_progress) is None
+
+    in_progress.clear()
+    future = watcher._submit_file(file_path, folder_slots, in_progress)
+    future.result()
+
+    mock_process_file.assert_called_once_with(file_path)
+    assert folder_slots.acquire(timeout=1)  # released by the done callback
+    assert not in_progress
+
+
+def test_new_file_handler_queues_files(tmp_path):
+    """
+    Ensures that created files and files moved into the watched folder are queued,
+    while directories and files moved elsewhere are ignored.
+
+    Args:
+        tmp_path (Path): Pytest fixture for creating a temporary directory.
+    """
+    work_queue = queue.Queue()
+    handler = _NewFileHandler(tmp_path, work_queue)
+
+    handler.on_created(SimpleNamespace(is_directory=False, src_path=str(tmp_path / "created.txt")))
+    handler.on_created(SimpleNamespace(is_directory=True, src_path=str(tmp_path / "working")))
+    handler.on_moved(SimpleNamespace(is_directory=False, src_path=str(tmp_path / "a.tmp"),
+                                     dest_path=str(tmp_path / "moved.txt")))
+    handler.on_moved(SimpleNamespace(is_directory=False, src_path=str(tmp_path / "b.txt"),
+                                     dest_path=str(tmp_path / "elsewhere" / "b.txt")))
+
+    assert list(work_queue.queue) == [str(tmp_path / "created.txt"), str(tmp_path / "moved.txt")]
+
+
+@patch.object(PipelineFileWatcher, "_submit_file")
+def test_process_queue_lists_folder_after_overflow(mock_submit_file, tmp_path):
+    """
+    Ensures that the event handler does not block on a full queue, and that the files
+    it had to drop are found by listing the subfolder once the queue is worked off.
+
+    Args:
+        mock_submit_file (MagicMock): Mocked version of PipelineFileWatcher._submit_file.
+        tmp_path (Path): Pytest fixture for creating a temporary directory.
+    """
+    first_file, dropped_file = str(tmp_path / "first.txt"), str(tmp_path / "dropped.txt")
+    Path(first_file).write_text("first")
+    Path(dropped_file).write_text("dropped")
+    handler = _NewFileHandler(tmp_path, queue.Queue(maxsize=1))
+
+    handler.on_created(SimpleNamespace(is_directory=False, src_path=first_file))
+    handler.on_created(SimpleNamespace(is_directory=False, src_path=dropped_file))  # queue full, must not block
+    assert handler.overflowed.is_set()
+
+    watcher = PipelineFileWatcher()
+    threading.Thread(target=watcher._process_queue, args=(handler, threading.BoundedSemaphore(1)),
+                     daemon=True).start()
+    handler.work_queue.join()
+    for _ in range(100):
+        if mock_submit_file.call_count >= 3:
+            break
+        threading.Event().wait(0.05)
+
+    submitted = [submit_call.args[0] for submit_call in mock_submit_file.call_args_list]
+    assert submitted[0] == first_file
+    assert sorted(submitted[1:]) == sorted([first_file, dropped_file])  # _submit_file skips those in progress
+    assert not handler.overflowed.is_set()
+
+
+def test_detect_new_files():
+    """
+    Ensures that polling reports new and modified files, but not unchanged or removed ones.
+    """
+    known_files = {"a.txt": 100, "b.txt": 200, "removed.txt": 300}
+    current_files = {"a.txt": 100, "b.txt": 250, "c.txt": 50}
+
+    assert _detect_new_files(current_files, known_files) == ["b.txt", "c.txt"]
+    assert _detect_new_files(current_files, current_files) == []
+
+
+@patch("utils.pipeline_file_watcher.pipeline_handling.process_file")
+def test_poll_all_stops(mock_process_file, tmp_path):
+    """
+    Ensures that the polling thread processes existing files and returns promptly once
+    the watcher is stopped, without waiting for the rest of its poll interval.
+
+    Args:
+        mock_process_file (MagicMock): Mocked version of pipeline_handling.process_file.
+        tmp_path (Path): Pytest fixture for creating a temporary directory.
+    """
+    watcher = PipelineFileWatcher()
+    file_path = tmp_path / "test_file.txt"
+    file_path.write_text("Some data")
+
+    thread = threading.Thread(target=watcher._poll_all, args=([tmp_path], 3600), daemon=True)
+    thread.start()
+    for _ in range(500):  # wait for the first poll to hand the file over
+        if mock_process_file.called:
+            break
+        threading.Event().wait(0.01)
+    watcher.stop()
+    thread.join(timeout=5)
+    watcher.executor.shutdown(wait=True)
+
+    assert not thread.is_alive()
+    mock_process_file.assert_called_once_with(str(file_path))
+
+
+@patch("utils.pipeline_file_watcher.pipeline_handling.process_file")
+def test_scan_folder_retries_busy_folder(mock_process_file, tmp_path):
+    """
+    Ensures that a file found while its subfolder has no free slot is not remembered,
+    so that the next scan submits it once the slot is free.
+
+    Args:
+        mock_process_file (MagicMock): Mocked version of pipeline_handling.process_file.
+        tmp_path (Path): Pytest fixture for creating a temporary directory.
+    """
+    watcher = PipelineFileWatcher()
+    file_path = tmp_path / "test_file.txt"
+    file_path.write_text("Some data")
+    folder_slots = threading.BoundedSemaphore(1)
+    in_progress = set()
+
+    folder_slots.acquire()
+    known_files = watcher._scan_folder(tmp_path, None, folder_slots, in_progress)
+    assert known_files == {}
+    mock_process_file.assert_not_called()
+
+    folder_slots.release()
+    known_files = watcher._scan_folder(tmp_path, known_files, folder_slots, in_progress)
+    watcher.executor.shutdown(wait=True)
+
+    assert list(known_files) == [str(file_path)]
+    mock_process_file.assert_called_once_with(str(file_path))
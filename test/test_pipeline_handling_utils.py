@@ -1,7 +1,13 @@
 import pytest
+import os
+import queue
+import threading
 from pathlib import Path
 from utils.file_ops import copy_file, rename_file, create_directory
-from utils.pipeline_handling import reflect_to_pipeline_storage
+from utils.pipeline_handling import reflect_to_pipeline_storage, purge_pipeline_storage, \
+    preload_processor_functions, get_processor_function, handle_processing_error, \
+    _load_processor, get_next_dir, _next_step_names, process_files, PROCESS_FILE_FUNCTION_NAME, \
+    process_file, worker_loop, check_declared_steps
 
 
 # GLOBAL FIXTURE
@@ -45,11 +51,13 @@ def test_reflect_success_file(temp_pipeline_structure, monkeypatch):
     monkeypatch.setattr("utils.pipeline_handling.PIPELINE_STORAGE_DIR", str(pipeline_storage_dir))
 
     # Call the reflect_to_pipeline_storage function (success case)
-    reflect_to_pipeline_storage(str(step_folder), str(file_to_reflect), result=True)
+    reflect_to_pipeline_storage(str(step_folder), str(file_to_reflect), result=True, timestamp="20240101_120000")
 
-    # Verify the file was copied to the correct storage location
-    reflected_file = pipeline_storage_dir / "10_raw_pdf" / file_to_reflect.name
+    # Verify the file was copied to the correct storage location, named <stem>_<status>_<timestamp><suffix>
+    # (no status for a file directly in the step folder)
+    reflected_file = pipeline_storage_dir / "10_raw_pdf" / "test_file__20240101_120000.txt"
     assert reflected_file.exists()
+    assert file_to_reflect.exists()  # copied, not moved
 
     # FIXED: Include the period at the end
     assert reflected_file.read_text() == "Test data for processing."
@@ -83,4 +91,262 @@ def test_reflect_error_file(temp_pipeline_structure, monkeypatch):
     # Verify the error file was copied and renamed correctly in storage
     reflected_error_file = pipeline_storage_dir / "10_raw_pdf" / f"{file_to_reflect.stem}_causing_error{file_to_reflect.suffix}"
     assert reflected_error_file.exists()
-    
\ No newline at end of file
+    
+
+
+def test_purge_pipeline_storage(temp_pipeline_structure, monkeypatch):
+    """
+    Test that purging removes files and folders of any depth but keeps the storage directory.
+    """
+    pipeline_storage_dir = temp_pipeline_structure["pipeline_storage_dir"]
+    deep_folder = pipeline_storage_dir / "10_raw_pdf" / "processed" / "archive"
+    deep_folder.mkdir(parents=True)
+    (deep_folder / "old_file.txt").write_text("old")
+    (pipeline_storage_dir / "loose_file.txt").write_text("loose")
+
+    monkeypatch.setattr("utils.pipeline_handling.PIPELINE_STORAGE_DIR", str(pipeline_storage_dir))
+
+    purge_pipeline_storage()
+
+    assert pipeline_storage_dir.is_dir()
+    assert list(pipeline_storage_dir.iterdir()) == []
+
+
+def test_preload_processor_functions(tmp_path, monkeypatch):
+    """
+    Test that every step script is imported once into the processor cache,
+    while other files, broken scripts and scripts without a step function are skipped.
+    """
+    (tmp_path / "pipeline_step_10_ok.py").write_text(f"def {PROCESS_FILE_FUNCTION_NAME}(path):\n    return True\n")
+    (tmp_path / "pipeline_step_20_broken.py").write_text("import module_that_does_not_exist\n")
+    (tmp_path / "pipeline_step_30_no_function.py").write_text("VERSION = 1\n")
+    (tmp_path / "helper.py").write_text("")
+
+    monkeypatch.setattr("utils.pipeline_handling.PROCESSES_DIR_STR", str(tmp_path))
+    _load_processor.cache_clear()
+    try:
+        processors = preload_processor_functions()
+
+        assert list(processors) == ["10_ok"]
+        assert get_processor_function("10_ok") is processors["10_ok"]
+    finally:
+        _load_processor.cache_clear()
+
+
+def test_handle_processing_error(temp_pipeline_structure, monkeypatch):
+    """
+    Test that both files are renamed with their error suffix, the original is moved out of
+    the watched step folder into "error" and is reflected into the pipeline storage as failed.
+    """
+    pipeline_storage_dir = temp_pipeline_structure["pipeline_storage_dir"]
+    step_dir = temp_pipeline_structure["step_folder"]
+    (step_dir / "working").mkdir()
+    original_file = step_dir / "scan.pdf"
+    working_file = step_dir / "working" / "scan.pdf"
+    original_file.write_text("original")
+    working_file.write_text("working")
+
+    monkeypatch.setattr("utils.pipeline_handling.PIPELINE_STORAGE_DIR", str(pipeline_storage_dir))
+
+    handle_processing_error(str(step_dir), str(original_file), str(working_file))
+
+    assert not original_file.exists()
+    assert not (step_dir / "scan_causing_error.pdf").exists()
+    assert (step_dir / "error" / "scan_causing_error.pdf").read_text() == "original"
+    assert (step_dir / "working" / "scan_work_error.pdf").exists()
+    assert [f.name for f in (pipeline_storage_dir / "10_raw_pdf").iterdir()] == ["scan_causing_error.pdf"]
+
+
+def test_reflect_with_given_timestamp(temp_pipeline_structure, monkeypatch):
+    """
+    Test that a given timestamp is used in the reflected file name instead of a new one.
+    """
+    step_folder = temp_pipeline_structure["step_folder"]
+    file_to_reflect = temp_pipeline_structure["file_to_reflect"]
+    pipeline_storage_dir = temp_pipeline_structure["pipeline_storage_dir"]
+
+    monkeypatch.setattr("utils.pipeline_handling.PIPELINE_STORAGE_DIR", str(pipeline_storage_dir))
+
+    reflect_to_pipeline_storage(str(step_folder), str(file_to_reflect), timestamp="20240101_120000")
+
+    assert (pipeline_storage_dir / "10_raw_pdf" / "test_file__20240101_120000.txt").exists()
+
+
+def test_get_processor_function_reloads_changed_script(tmp_path, monkeypatch):
+    """
+    Test that a step function is loaded once and loaded again after its script changed.
+    """
+    script = tmp_path / "pipeline_step_10_ok.py"
+    script.write_text(f"def {PROCESS_FILE_FUNCTION_NAME}(path):\n    return 1\n")
+    monkeypatch.setattr("utils.pipeline_handling.PROCESSES_DIR_STR", str(tmp_path))
+    _load_processor.cache_clear()
+    try:
+        first = get_processor_function("10_ok")
+        assert get_processor_function("10_ok") is first
+
+        script.write_text(f"def {PROCESS_FILE_FUNCTION_NAME}(path):\n    return 2\n")
+        stat = script.stat()
+        os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert get_processor_function("10_ok")("file.txt") == 2
+        with pytest.raises(ImportError):
+            get_processor_function("20_missing")
+    finally:
+        _load_processor.cache_clear()
+
+
+def test_get_next_dir(tmp_path, monkeypatch):
+    """
+    Test that the next step folder is found alphabetically and that a step folder
+    added later is picked up once the pipeline directory changed.
+    """
+    (tmp_path / "10_first").mkdir()
+    (tmp_path / "20_second").mkdir()
+    (tmp_path / "notes.txt").write_text("not a step")
+    monkeypatch.setattr("utils.pipeline_handling.PIPELINE_DIR", tmp_path)
+    _next_step_names.cache_clear()
+    try:
+        assert get_next_dir(str(tmp_path / "10_first" / "file.txt")) == str(tmp_path / "20_second")
+        assert get_next_dir(str(tmp_path / "20_second" / "file.txt")) is None
+
+        (tmp_path / "30_third").mkdir()
+        stat = tmp_path.stat()
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert get_next_dir(str(tmp_path / "20_second" / "file.txt")) == str(tmp_path / "30_third")
+    finally:
+        _next_step_names.cache_clear()
+
+
+def test_process_files(monkeypatch):
+    """
+    Test that every file of a batch is processed and that failing files are reported.
+    """
+    processed = []
+
+    def fake_process_file(file_path):
+        processed.append(file_path)
+        if file_path.endswith("broken.txt"):
+            raise RuntimeError("processing failed")
+
+    monkeypatch.setattr("utils.pipeline_handling.process_file", fake_process_file)
+
+    failed = process_files(["a.txt", "broken.txt", "b.txt"], max_workers=2)
+
+    assert sorted(processed) == ["a.txt", "b.txt", "broken.txt"]
+    assert failed == ["broken.txt"]
+
+
+def test_process_files_same_path_twice(monkeypatch):
+    """
+    Test that a failure is reported when the same file is given twice and only its first run fails.
+    """
+    processed = []
+
+    def fake_process_file(file_path):
+        processed.append(file_path)
+        if len(processed) == 1:
+            raise RuntimeError("processing failed")
+
+    monkeypatch.setattr("utils.pipeline_handling.process_file", fake_process_file)
+
+    failed = process_files(["a.txt", "a.txt"], max_workers=1)
+
+    assert processed == ["a.txt", "a.txt"]
+    assert failed == ["a.txt"]
+
+
+def test_process_file_without_mirror_on_success(temp_pipeline_structure, monkeypatch):
+    """
+    Test that with mirror_on_success disabled a successful step stores nothing,
+    removes the original and still moves the result on.
+    """
+    step_folder = temp_pipeline_structure["step_folder"]
+    file_to_reflect = temp_pipeline_structure["file_to_reflect"]
+    pipeline_storage_dir = temp_pipeline_structure["pipeline_storage_dir"]
+    processes_dir = step_folder.parent.parent / "processes"
+    processes_dir.mkdir()
+    (processes_dir / "pipeline_step_10_raw_pdf.py").write_text(
+        "import os, shutil\n"
+        f"def {PROCESS_FILE_FUNCTION_NAME}(path):\n"
+        "    step_dir = os.path.dirname(os.path.dirname(path))\n"
+        "    shutil.copy(path, os.path.join(step_dir, 'processed', os.path.basename(path)))\n"
+        "    return True\n"
+    )
+
+    monkeypatch.setattr("utils.pipeline_handling.PROCESSES_DIR_STR", str(processes_dir))
+    monkeypatch.setattr("utils.pipeline_handling.PIPELINE_DIR", step_folder.parent)
+    monkeypatch.setattr("utils.pipeline_handling.PIPELINE_STORAGE_DIR", str(pipeline_storage_dir))
+    monkeypatch.setattr("utils.pipeline_handling.MIRROR_ON_SUCCESS", False)
+    _load_processor.cache_clear()
+    _next_step_names.cache_clear()
+    try:
+        process_file(str(file_to_reflect))
+    finally:
+        _load_processor.cache_clear()
+        _next_step_names.cache_clear()
+
+    assert not file_to_reflect.exists()
+    assert (step_folder / "processed" / file_to_reflect.name).exists()
+    assert list(pipeline_storage_dir.iterdir()) == []
+
+
+def test_worker_loop(monkeypatch):
+    """
+    Test that the worker processes queued files, survives a failing file and stops on the event.
+    """
+    processed = []
+
+    def fake_process_file(file_path):
+        processed.append(file_path)
+        if file_path == "broken.txt":
+            raise RuntimeError("processing failed")
+
+    monkeypatch.setattr("utils.pipeline_handling.process_file", fake_process_file)
+    work_queue = queue.Queue()
+    stop_event = threading.Event()
+    worker = threading.Thread(target=worker_loop, args=(work_queue, stop_event, 0.05), daemon=True)
+    worker.start()
+
+    for file_path in ("a.txt", "broken.txt", "b.txt"):
+        work_queue.put(file_path)
+    work_queue.join()
+    stop_event.set()
+    worker.join(timeout=5)
+
+    assert processed == ["a.txt", "broken.txt", "b.txt"]
+    assert not worker.is_alive()
+
+
+def test_get_next_dir_with_declared_steps(tmp_path, monkeypatch):
+    """
+    Test that a declared step order is followed instead of the alphabetical order.
+    """
+    monkeypatch.setattr("utils.pipeline_handling.PIPELINE_DIR", tmp_path)
+    monkeypatch.setattr("utils.pipeline_handling.PIPELINE_STEPS", ("20_ocr", "10_raw_pdf", "30_index"))
+
+    assert get_next_dir(str(tmp_path / "20_ocr" / "file.txt")) == str(tmp_path / "10_raw_pdf")
+    assert get_next_dir(str(tmp_path / "10_raw_pdf" / "file.txt")) == str(tmp_path / "30_index")
+    assert get_next_dir(str(tmp_path / "30_index" / "file.txt")) is None
+
+
+def test_check_declared_steps(tmp_path, monkeypatch, caplog):
+    """
+    Test that step folders missing from the declared steps are reported, and that a file of
+    such a step is treated as finished with a warning.
+    """
+    for step in ("10_raw_pdf", "15_new_step", "20_ocr"):
+        (tmp_path / step).mkdir()
+    monkeypatch.setattr("utils.pipeline_handling.PIPELINE_DIR", tmp_path)
+    monkeypatch.setattr("utils.pipeline_handling.PIPELINE_STEPS", ("10_raw_pdf", "20_ocr", "30_index"))
+
+    with caplog.at_level("WARNING", logger="pipeline_handling"):
+        assert check_declared_steps() == ["15_new_step"]
+        assert get_next_dir(str(tmp_path / "15_new_step" / "file.txt")) is None
+
+    assert "'15_new_step' is not in the declared steps" in caplog.text
+    assert "declared step '30_index' has no folder" in caplog.text
+    assert "step '15_new_step' is not in the declared steps, treating it as the last step" in caplog.text
+
+    monkeypatch.setattr("utils.pipeline_handling.PIPELINE_STEPS", ())
+    assert check_declared_steps() == []
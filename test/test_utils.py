@@ -1,7 +1,18 @@
+import errno
+import logging
+import os
+import sys
+import threading
+import time
 import pytest
+import setup.logging_setup as logging_setup
+import utils.file_ops as file_ops
 from pathlib import Path
-from utils.file_ops import create_directory, move_file, copy_file, rename_file
-from utils.pipeline_handling import create_working_dir
+from utils.cache_utils import cache_function
+from utils.decorators import log_exceptions_with_args
+from utils.file_ops import create_directory, ensure_directory, move_file, move_files, copy_file, link_or_copy_file, rename_file, append_line, _copy_file_in_kernel, \
+    check_file_is_ready, map_file_read_only, wait_until_file_ready
+from utils.pipeline_handling import create_working_dir, accepts_buffer
 
 
 # GLOBAL FIXTURES
@@ -41,6 +52,25 @@ def test_create_directory(temp_test_structure):
     assert created_dir.is_dir()
 
 
+def test_ensure_directory(temp_test_structure):
+    """
+    Test that ensure_directory creates a directory once and only touches the disk
+    again after its cache was cleared.
+    """
+    new_dir = temp_test_structure["base_dir"] / "ensured_folder"
+
+    ensure_directory(str(new_dir))
+    assert new_dir.is_dir()
+
+    new_dir.rmdir()
+    ensure_directory(str(new_dir))  # answered from the cache
+    assert not new_dir.exists()
+
+    ensure_directory.cache_clear()
+    ensure_directory(str(new_dir))
+    assert new_dir.is_dir()
+
+
 def test_move_file(temp_test_structure):
     """
     Test moving a file using the move_file() function.
@@ -61,6 +91,42 @@ def test_move_file(temp_test_structure):
     assert moved_file.parent == destination_folder
 
 
+def test_move_file_across_filesystems(temp_test_structure, monkeypatch):
+    """
+    Test that move_file copies and removes the source when a rename is not possible.
+    """
+    def cross_device_replace(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(file_ops.os, "replace", cross_device_replace)
+    monkeypatch.setattr(file_ops, "wait_until_file_ready", lambda file_path: True)
+
+    file_to_move = temp_test_structure["file_to_move"]
+    destination_folder = temp_test_structure["base_dir"] / "other_device"
+
+    moved_file = move_file(str(file_to_move), str(destination_folder))
+
+    assert moved_file.read_text() == "This is a test file!"
+    assert not file_to_move.exists()
+
+
+def test_move_files(temp_test_structure, caplog):
+    """
+    Test moving several files into one folder with move_files().
+    """
+    base_dir = temp_test_structure["base_dir"]
+    files = [temp_test_structure["file_to_move"], base_dir / "second_file.txt"]
+    files[1].write_text("Second file!")
+    destination_folder = base_dir / "bulk_destination"
+
+    moved_files = move_files([str(file) for file in files], str(destination_folder))
+
+    assert moved_files == [destination_folder / "test_file.txt", destination_folder / "second_file.txt"]
+    assert moved_files[1].read_text() == "Second file!"
+    assert not any(file.exists() for file in files)
+    assert f"Moved 2 files to {destination_folder}" in caplog.text
+
+
 def test_copy_file(temp_test_structure):
     """
     Test copying a file using the copy_file() function.
@@ -81,6 +147,57 @@ def test_copy_file(temp_test_structure):
     assert copied_file.parent == destination_folder
 
 
+def test_copy_file_when_kernel_copy_copies_nothing(temp_test_structure, monkeypatch):
+    """
+    Test that copy_file does not hand out an empty copy when copy_file_range returns 0
+    without copying anything (some FUSE, virtiofs, older kernels).
+    """
+    base_dir = temp_test_structure["base_dir"]
+    file_to_copy = temp_test_structure["file_to_move"]
+    monkeypatch.setattr("os.copy_file_range", lambda *args: 0, raising=False)
+
+    copied_file = copy_file(str(file_to_copy), str(base_dir / "working"))
+
+    assert copied_file.read_text() == "This is a test file!"
+
+
+def test_move_file_with_new_name(temp_test_structure):
+    """
+    Test moving a file into a folder under a new name in one step.
+    """
+    file_to_move = temp_test_structure["file_to_move"]
+    destination_folder = temp_test_structure["base_dir"] / "renamed_destination"
+
+    moved_file = move_file(str(file_to_move), str(destination_folder), new_name="renamed.txt")
+
+    assert moved_file == destination_folder / "renamed.txt"
+    assert moved_file.read_text() == "This is a test file!"
+    assert not file_to_move.exists()
+
+
+@pytest.mark.parametrize("link_fails", [False, True])
+def test_link_or_copy_file(link_fails, temp_test_structure, monkeypatch):
+    """
+    Test that link_or_copy_file hard links the file, or copies it where linking is not possible.
+    """
+    def no_link(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    if link_fails:
+        monkeypatch.setattr(file_ops.os, "link", no_link)
+    monkeypatch.setattr(file_ops, "wait_until_file_ready", lambda file_path: True)
+
+    source = temp_test_structure["file_to_move"]
+    destination_folder = temp_test_structure["base_dir"] / "storage"
+
+    linked_file = link_or_copy_file(str(source), str(destination_folder), new_name="stored.txt")
+
+    assert linked_file == destination_folder / "stored.txt"
+    assert linked_file.read_text() == "This is a test file!"
+    assert source.exists()
+    assert linked_file.samefile(source) != link_fails
+
+
 def test_rename_file(temp_test_structure):
     """
     Test renaming a file using the rename_file() function.
@@ -97,6 +214,95 @@ def test_rename_file(temp_test_structure):
     assert renamed_file.name == new_name
 
 
+def test_append_line(temp_test_structure):
+    """
+    Test appending lines to an existing and to a new file using append_line().
+    """
+    base_dir = temp_test_structure["base_dir"]
+    existing_file = temp_test_structure["file_to_move"]
+    new_file = base_dir / "new_file.txt"
+
+    append_line(str(existing_file), "\nfirst line\n")
+    append_line(str(existing_file), "second line\n")
+    append_line(str(new_file), "only line\n")
+
+    # Assert the lines were appended in order and the new file was created
+    assert existing_file.read_text() == "This is a test file!\nfirst line\nsecond line\n"
+    assert new_file.read_text() == "only line\n"
+
+
+@pytest.mark.parametrize("kernel_copy_fails", [False, True])
+def test_copy_file_in_kernel(kernel_copy_fails, temp_test_structure, monkeypatch):
+    """
+    Test that the cross-device copy used by move_file copies the content,
+    also when the in-kernel copy calls are not available.
+    """
+    source = temp_test_structure["file_to_move"]
+    destination = temp_test_structure["base_dir"] / "copied.txt"
+
+    if kernel_copy_fails:
+        def fail(*args):
+            raise OSError("not supported")
+        monkeypatch.setattr("os.copy_file_range", fail, raising=False)
+        monkeypatch.setattr("os.sendfile", fail, raising=False)
+
+    _copy_file_in_kernel(str(source), str(destination))
+
+    assert destination.read_text() == "This is a test file!"
+
+
+@pytest.mark.parametrize("sendfile_copies_nothing", [False, True])
+def test_copy_file_in_kernel_when_nothing_is_copied(sendfile_copies_nothing, temp_test_structure, monkeypatch):
+    """
+    Test that a kernel copy returning 0 before anything was copied is not taken as end of
+    file (the destination would stay empty), the next method copies the content instead.
+    """
+    source = temp_test_structure["file_to_move"]
+    destination = temp_test_structure["base_dir"] / "copied.txt"
+
+    monkeypatch.setattr("os.copy_file_range", lambda *args: 0, raising=False)
+    if sendfile_copies_nothing:
+        monkeypatch.setattr("os.sendfile", lambda *args: 0, raising=False)
+
+    _copy_file_in_kernel(str(source), str(destination))
+
+    assert destination.read_text() == "This is a test file!"
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is only available on Linux")
+def test_check_file_is_ready_when_writer_closes(temp_test_structure):
+    """
+    Test that a file is reported ready as soon as its writer closes it,
+    without waiting for the stable size checks.
+    """
+    file_path = temp_test_structure["file_to_move"]
+
+    def finish_writing():
+        time.sleep(0.2)
+        with open(file_path, "a") as file:
+            file.write(" More data.")
+
+    writer = threading.Thread(target=finish_writing)
+    writer.start()
+    start_time = time.time()
+    assert check_file_is_ready(str(file_path), checks=3, interval=2.0)
+    writer.join()
+
+    assert time.time() - start_time < 2.0
+
+
+def test_check_file_is_ready_polling(temp_test_structure, monkeypatch):
+    """
+    Test the polling check used where inotify is not available: a file
+    which is not changed any more is ready after the given number of checks.
+    """
+    monkeypatch.setattr(file_ops, "_open_file_watch", lambda file_path: None)
+    file_path = temp_test_structure["file_to_move"]
+
+    assert check_file_is_ready(str(file_path), checks=2, interval=0.1)
+    assert not check_file_is_ready(str(file_path.with_name("missing.txt")), checks=2, interval=0.1)
+
+
 # TESTS FOR pipeline_handling.py
 
 
@@ -140,11 +346,11 @@ def test_logging_in_file_ops(temp_test_structure, caplog):
     file_to_move = temp_test_structure["file_to_move"]
     destination_folder = base_dir / "logged_destination"
 
-    # Perform file move operation (should log info)
-    with caplog.at_level("INFO"):
+    # Perform file move operation (logs each move at debug level)
+    with caplog.at_level("DEBUG"):
         move_file(str(file_to_move), str(destination_folder))
 
-    # Verify an info-level log was recorded for this operation
+    # Verify a debug-level log was recorded for this operation
     assert "Moved file" in caplog.text
 
 
@@ -174,3 +380,106 @@ def test_rename_and_move_file(file_name, tmp_path):
     assert "renamed_" in Path(moved_file).name
 
 
+def test_log_exceptions_with_args(caplog):
+    """
+    Test that the shared decorator logs the failing function's name and re-raises.
+    """
+    test_logger = logging.getLogger("test_decorators")
+
+    @log_exceptions_with_args(test_logger)
+    def failing_step(file_path):
+        raise ValueError(file_path)
+
+    with caplog.at_level("ERROR", logger="test_decorators"):
+        with pytest.raises(ValueError):
+            failing_step("some/file.txt")
+
+    assert failing_step.__name__ == "failing_step"
+    assert "Exception in function 'failing_step'" in caplog.text
+
+
+def test_cache_function_normalizes_paths(tmp_path):
+    """
+    Test that a cache_function with normalize_paths shares one entry for a str and a Path.
+    """
+    calls = []
+
+    @cache_function(maxsize=8, normalize_paths=True)
+    def file_name(file_path):
+        calls.append(file_path)
+        return Path(file_path).name
+
+    assert file_name(str(tmp_path / "a.txt")) == "a.txt"
+    assert file_name(tmp_path / "a.txt") == "a.txt"
+    assert calls == [str(tmp_path / "a.txt")]
+    assert file_name.cache_info().hits == 1
+
+
+def test_map_file_read_only(tmp_path):
+    """
+    Test that the file content is readable through the map and that empty files yield None.
+    """
+    file_path = tmp_path / "data.txt"
+    file_path.write_bytes(b"Some data")
+    empty_path = tmp_path / "empty.txt"
+    empty_path.touch()
+
+    with map_file_read_only(str(file_path)) as buffer:
+        assert buffer[:] == b"Some data"
+    assert buffer.closed
+    with map_file_read_only(str(empty_path)) as buffer:
+        assert buffer is None
+
+
+def test_accepts_buffer():
+    """
+    Test that only step functions with a 'buffer' parameter are called with the map.
+    """
+    def path_only(file_path):
+        return True
+
+    @log_exceptions_with_args(logging.getLogger("test_accepts_buffer"))
+    def with_buffer(file_path, buffer=None):
+        return True
+
+    assert not accepts_buffer(path_only)
+    assert accepts_buffer(with_buffer)
+
+
+def test_wait_until_file_ready_missing_file(tmp_path):
+    """
+    Test that waiting for a file which does not exist gives up at once instead of after max_wait.
+    """
+    start = time.monotonic()
+    assert wait_until_file_ready(str(tmp_path / "missing.txt"), max_wait=60) is False
+    assert time.monotonic() - start < 5
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_queued_log_records_of_forked_child(tmp_path):
+    """
+    Test that a forked child writes its log records through its own listener instead of
+    the queue of the parent, which nobody drains in the child.
+    """
+    logfile_path = tmp_path / "forked.log"
+    test_logger = logging.getLogger("test_forked_child")
+    test_logger.setLevel(logging.DEBUG)
+    test_logger.addHandler(logging_setup.get_queued_file_handler(logfile_path))
+    test_logger.info("from parent")
+
+    pid = os.fork()
+    if pid == 0:  # child, must never return into pytest
+        exit_code = 1
+        try:
+            test_logger.info("from child")
+            logging_setup._stop_listener()
+            exit_code = 0
+        finally:
+            os._exit(exit_code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+    logging_setup._stop_listener()  # flushes the parent, the next logger starts a new listener
+    log_text = logfile_path.read_text()
+    assert "from parent" in log_text
+    assert "from child" in log_text
@@ -1,18 +1,31 @@
 import functools
+import os
 
 CACHE_SIZES = {}
 
-def cache_function(maxsize=128):
+def cache_function(maxsize=128, normalize_paths=False):
+    """
+    Memoizes a function with functools.lru_cache. Only use it on functions without side effects,
+    a cached call does not run the function again.
+
+    :param maxsize: cache size, can be overridden per function name in CACHE_SIZES
+    :param normalize_paths: convert str/Path positional arguments with os.fspath before the lookup,
+        so that calls with a str and with a Path of the same path share one cache entry
+    :return: decorator
+    """
     def decorator(func):
         size = CACHE_SIZES.get(func.__name__, maxsize)
-        cached_func = functools.lru_cache(maxsize=size)(func)
+        # lru_cache already keeps __name__/__wrapped__ and provides cache_clear/cache_info,
+        # returning it directly avoids an extra Python call in front of its C fast path
+        cached_func = functools.cache(func) if size is None else functools.lru_cache(maxsize=size)(func)
+        if not normalize_paths:
+            return cached_func
 
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            return cached_func(*args, **kwargs)
+            return cached_func(*(os.fspath(arg) if isinstance(arg, os.PathLike) else arg for arg in args), **kwargs)
 
         wrapper.cache_clear = cached_func.cache_clear
         wrapper.cache_info = cached_func.cache_info
-        wrapper.__name__ = func.__name__
-
         return wrapper
     return decorator
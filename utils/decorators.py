@@ -0,0 +1,37 @@
+import functools
+import logging
+from typing import Callable
+
+
+def log_exceptions_with_args(logger: logging.Logger) -> Callable[[Callable], Callable]:
+    """
+    Creates a decorator that logs exceptions raised by the wrapped function to the given
+    logger, including the function name and traceback, and re-raises them for further handling.
+    Each module builds its decorator once with its own logger:
+
+    log_exceptions_with_args = decorators.log_exceptions_with_args(logger)
+
+    Args:
+        logger (logging.Logger): Logger the exceptions are written to.
+
+    Returns:
+        Callable: Decorator to wrap functions with.
+    """
+    log_error = logger.error
+
+    def decorator(func: Callable) -> Callable:
+        # Looked up once at decoration time instead of on every failing call
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                # Only the function name is logged, the traceback carries the details.
+                log_error("Exception in function '%s'", name, exc_info=True)
+                raise  # Re-raise the exception after logging.
+
+        return wrapper
+
+    return decorator
@@ -1,32 +1,87 @@
-import logging
 import os
+import sys
+import errno
 import time
-import shutil
+import select
+import struct
+import ctypes
+import ctypes.util
+import mmap
+import functools
+import contextlib
 from pathlib import Path
-from datetime import datetime
-from utils.cache_utils import cache_function
+from typing import Iterable, Iterator, List, Optional
 
 import setup.logging_setup as logging_setup  # Function to initialise logger
-from setup import config_setup  # Interfaces with config.ini functionalities
 
-# Dynamically obtain the logger name from the script name (without extension).
-config = config_setup.get_prod_config()
-script_name: str = Path(__file__).stem
+# Logger named after the script (without extension), writing to logs/<script name>.log
+logger, logfile_path = logging_setup.get_step_logger(__file__)
 
-# Build the absolute path for the log file
-logs_dir: Path = logging_setup.configure_logs_directory()
-logfile_path = os.path.join(logs_dir, f"{script_name}.log")
+# Buffer size for copies which can not be done in the kernel
+COPY_BUFFER_SIZE: int = 1024 * 1024
 
-# Get the logger instance
-logger = logging_setup.get_logger(
-    logger_name=script_name,
-    logfile_name=logfile_path,
-    console_level=logging.INFO,
-    file_level=logging.DEBUG
-)
+
+# inotify event flags (see <sys/inotify.h>) used by check_file_is_ready on Linux
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_IGNORED = 0x00008000
+_IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+@functools.lru_cache(maxsize=1)
+def _load_inotify():
+    """
+    Returns libc with the inotify functions, or None where inotify is not available
+    (other operating systems, libc without inotify).
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def _open_file_watch(file_path: str) -> Optional[int]:
+    """
+    Opens an inotify instance watching the file for writes, closing and removal.
+
+    Returns:
+        Optional[int]: File descriptor of the inotify instance, or None if the file can not be watched.
+    """
+    libc = _load_inotify()
+    if libc is None:
+        return None
+    fd = libc.inotify_init1(_IN_CLOEXEC)
+    if fd < 0:
+        return None
+    mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_DELETE_SELF | _IN_MOVE_SELF
+    if libc.inotify_add_watch(fd, os.fsencode(file_path), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _read_event_mask(fd: int) -> int:
+    """
+    Reads all pending inotify events and returns their combined mask.
+    """
+    buffer = os.read(fd, 4096)
+    mask = 0
+    offset = 0
+    while offset + _INOTIFY_EVENT_HEADER.size <= len(buffer):
+        _, event_mask, _, name_length = _INOTIFY_EVENT_HEADER.unpack_from(buffer, offset)
+        mask |= event_mask
+        offset += _INOTIFY_EVENT_HEADER.size + name_length
+    return mask
 
 
-@cache_function(maxsize=256)
 def check_file_is_ready(file_path: str,
                         checks: int = 3,
                         interval: float = 2.0,
@@ -35,11 +90,15 @@ def check_file_is_ready(file_path: str,
         Checks if a file is ready by verifying that its size has not changed for a specified number of
         consecutive checks within a given timeout period.
 
-        The function uses a caching mechanism to optimize frequent calls with identical arguments. If the
-        file's size remains stable for a specified number of consecutive checks, it is considered ready. The
+        If the file's size remains stable for a specified number of consecutive checks, it is considered ready. The
         function ensures the check respects the provided time interval and stops if the operation exceeds the
         specified timeout.
 
+        Times are measured with time.monotonic, so clock changes do not affect the timeout.
+        On Linux the file is watched with inotify instead of polling its size: it is ready as soon as a
+        writer closes it, or once it was not modified for checks * interval seconds. Other systems, or
+        files inotify can not watch, use the polling check.
+
         Parameters:
         file_path (str): Path to the file to check.
         checks (int): Number of consecutive checks to confirm the file's stability. Default is 3.
@@ -52,32 +111,81 @@ def check_file_is_ready(file_path: str,
         Raises:
         None
     """
-    start_time = time.time()
-    file_path_obj = Path(file_path)
-    if not file_path_obj.is_file():
-        logger.warning(f"File '{file_path}' does not exist or is not a regular file.")
+    start_time = time.monotonic()
+    if not os.path.isfile(file_path):
+        logger.warning("File '%s' does not exist or is not a regular file.", file_path)
         return False
 
-    stable_count = 0
-    last_size = os.path.getsize(file_path)
+    watch_fd = _open_file_watch(file_path)
+    if watch_fd is None:
+        return _poll_file_is_ready(file_path, checks, interval, timeout, start_time)
+    try:
+        return _wait_for_file_quiet(watch_fd, file_path, checks * interval, timeout, start_time)
+    finally:
+        os.close(watch_fd)
+
+
+def _wait_for_file_quiet(watch_fd: int, file_path: str, quiet_period: float, timeout: float,
+                         start_time: float) -> bool:
+    """
+    Waits on the inotify instance until the file is closed by its writer or was not modified
+    for quiet_period seconds. See check_file_is_ready.
+    """
+    deadline = start_time + timeout
+    last_modified = start_time
     while True:
-        time.sleep(interval)
-        current_size = os.path.getsize(file_path)
-        if current_size == last_size:
-            stable_count += 1
-        else:
-            stable_count = 0  # Reset if the file size changes
-        last_size = current_size
-
-        if stable_count >= checks:
-            logger.debug(f"File '{file_path}' is ready (stable for {checks} consecutive checks).")
-            return True
-        if (time.time() - start_time) > timeout:
-            logger.error(f"Timeout: File '{file_path}' did not become stable within {timeout} seconds.")
+        wait_for = min(last_modified + quiet_period, deadline) - time.monotonic()
+        readable, _, _ = select.select([watch_fd], [], [], max(wait_for, 0.0))
+        if not readable:
+            if time.monotonic() >= last_modified + quiet_period:
+                logger.debug("File '%s' is ready (not modified for %s seconds).", file_path, quiet_period)
+                return True
+            logger.error("Timeout: File '%s' did not become stable within %s seconds.", file_path, timeout)
             return False
 
+        mask = _read_event_mask(watch_fd)
+        if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED):
+            logger.warning("File '%s' was removed or moved while waiting for it.", file_path)
+            return False
+        if mask & _IN_CLOSE_WRITE:
+            logger.debug("File '%s' is ready (closed by its writer).", file_path)
+            return True
+        last_modified = time.monotonic()
+
+
+def _poll_file_is_ready(file_path: str, checks: int, interval: float, timeout: float,
+                        start_time: float) -> bool:
+    """
+    Polls size and modification time of the file until they were stable for checks consecutive checks.
+    See check_file_is_ready.
+    """
+    # The file is opened once and checked with fstat, the path is not resolved again per check.
+    # Size and modification time are compared together: a write that keeps the size still counts.
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        stable_count = 0
+        file_stat = os.fstat(fd)
+        last_state = (file_stat.st_size, file_stat.st_mtime_ns)
+        while True:
+            time.sleep(interval)
+            file_stat = os.fstat(fd)
+            current_state = (file_stat.st_size, file_stat.st_mtime_ns)
+            if current_state == last_state:
+                stable_count += 1
+            else:
+                stable_count = 0  # Reset if the file changes
+            last_state = current_state
+
+            if stable_count >= checks:
+                logger.debug("File '%s' is ready (stable for %s consecutive checks).", file_path, checks)
+                return True
+            if (time.monotonic() - start_time) > timeout:
+                logger.error("Timeout: File '%s' did not become stable within %s seconds.", file_path, timeout)
+                return False
+    finally:
+        os.close(fd)
+
 
-@cache_function(maxsize=256)
 def wait_until_file_ready(file_path: str,
                           check_interval: float = 1.0,
                           max_wait: float = 300.0,
@@ -87,7 +195,7 @@ def wait_until_file_ready(file_path: str,
     """
     Wait until a file is ready for processing. The file is considered ready when its
     size remains stable over a set number of checks. If the file is not ready within
-    the specified max_wait time, the function returns False.
+    the specified max_wait time, or does not exist, the function returns False.
 
     Args:
         file_path (str): Path to the file to be checked.
@@ -110,24 +218,27 @@ def wait_until_file_ready(file_path: str,
         ):
             return True
 
+        # A missing file will not become ready, the caller's file operation reports it
+        if not os.path.isfile(file_path):
+            return False
+
         elapsed_time = time.time() - start_time
         if elapsed_time >= max_wait:
-            logger.error(f"Max wait time of {max_wait} seconds exceeded for file '{file_path}'.")
+            logger.error("Max wait time of %s seconds exceeded for file '%s'.", max_wait, file_path)
             return False
 
-        logger.info(f"File '{file_path}' is not ready yet. Retrying in {check_interval} second(s)...")
+        logger.info("File '%s' is not ready yet. Retrying in %s second(s)...", file_path, check_interval)
         time.sleep(check_interval)
 
 
-@cache_function(maxsize=256)
 def generate_timestamp() -> str:
     """
     Return the current date and time in a clear format.
     """
+    from datetime import datetime  # imported on first use, keeps the module import cheap
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
 
-@cache_function(maxsize=256)
 def create_directory(directory_path: str) -> Path:
     """
     Ensure the directory exists; if not, create it.
@@ -138,65 +249,220 @@ def create_directory(directory_path: str) -> Path:
     Returns:
         Path: The created or existing directory as a Path object.
     """
-    path = Path(directory_path)
-    path.mkdir(parents=True, exist_ok=True)
-    logger.debug(f"Ensured directory exists: {directory_path}")
-    return path
+    # A stat for the usual case of an existing directory, mkdir only when it is missing
+    if not os.path.isdir(directory_path):
+        os.makedirs(directory_path, exist_ok=True)
+    logger.debug("Ensured directory exists: %s", directory_path)
+    return Path(directory_path)
+
+
+@functools.lru_cache(maxsize=1024)
+def ensure_directory(directory_path: str) -> None:
+    """
+    Create the directory (with parents) once per process; later calls for the same
+    path are answered from the cache without touching the disk. Call
+    ensure_directory.cache_clear() after deleting directories that may be ensured again.
 
+    Args:
+        directory_path (str): Path to the directory.
+    """
+    create_directory(directory_path)
 
-@cache_function(maxsize=256)
-def move_file(file_path: str, destination_folder: str) -> Path:
+
+def _copy_file_in_kernel(src: str, dst: str, copy_metadata: bool = True) -> None:
+    """
+    Copy a file's content and metadata without passing the data through Python buffers.
+
+    os.copy_file_range is tried first (a reflink/server side clone where the filesystem
+    supports it), then os.sendfile (Linux before 4.5), then shutil.copyfileobj with a
+    1 MiB buffer on unbuffered files (no kernel copy available). Both kernel calls may copy less than
+    requested, so they run in a loop. A method that fails, or copies nothing at all (some
+    filesystems answer 0 instead of an error), hands over to the next one at the current file offset.
+
+    Args:
+        src (str): Path of the source file.
+        dst (str): Path of the destination file (overwritten if it exists).
+        copy_metadata (bool): Copy permissions and times (shutil.copystat) if True,
+            only the permission bits (shutil.copymode, like shutil.copy) if False.
+    """
+    import shutil  # imported on first use, keeps the module import cheap
+
+    with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        size = remaining = os.fstat(src_fd).st_size
+        for kernel_copy in (
+                getattr(os, "copy_file_range", None),
+                (lambda in_fd, out_fd, count: os.sendfile(out_fd, in_fd, None, count))
+                if hasattr(os, "sendfile") else None,
+        ):
+            if kernel_copy is None or remaining <= 0:
+                continue
+            try:
+                while remaining > 0:
+                    copied = kernel_copy(src_fd, dst_fd, remaining)
+                    if copied == 0:
+                        # 0 is only end of file once data was copied (the source shrank while copying);
+                        # at the start it means the call does not work here (FUSE, virtiofs, older kernels)
+                        if remaining < size:
+                            remaining = 0
+                        break
+                    remaining -= copied
+            except OSError as e:
+                logger.debug("In-kernel copy of %s failed (%s), trying next method", src, e)
+        if remaining > 0:
+            shutil.copyfileobj(fsrc, fdst, COPY_BUFFER_SIZE)
+    if copy_metadata:
+        shutil.copystat(src, dst)
+    else:
+        shutil.copymode(src, dst)
+
+
+def move_file(file_path: str, destination_folder: str, new_name: Optional[str] = None) -> Path:
     """
     Move a file to a specified folder.
 
     Args:
         file_path (str): Path to the file to be moved.
         destination_folder (str): Directory where the file should be moved.
+        new_name (Optional[str]): Name of the file in the destination folder, saves a separate
+            rename_file call. Defaults to the current name.
 
     Returns:
         Path: The new path of the moved file.
     """
     try:
-        file_path = Path(file_path)
-        destination_folder = Path(destination_folder)
-        create_directory(str(destination_folder))  # Ensure destination exists
-        destination_path = destination_folder / file_path.name
-        wait_until_file_ready(str(file_path))
-        shutil.move(str(file_path), str(destination_path))
-        logger.debug(f"Moved file: {file_path} to {destination_path}")
-        return destination_path
+        # Plain strings internally, a Path is only created for the return value
+        file_path = os.fspath(file_path)
+        destination_folder = os.fspath(destination_folder)
+        ensure_directory(destination_folder)  # Ensure destination exists
+        destination_path = os.path.join(destination_folder, new_name or os.path.basename(file_path))
+        wait_until_file_ready(file_path)
+        try:
+            # Same filesystem: a single atomic rename, no data is copied and nothing is stat'ed first
+            os.replace(file_path, destination_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Different filesystem: copy and remove the source
+            _copy_file_in_kernel(file_path, destination_path)
+            os.unlink(file_path)
+        logger.debug("Moved file: %s to %s", file_path, destination_path)
+        return Path(destination_path)
     except Exception as e:
-        logger.error(f"Error moving file {file_path} to {destination_folder}: {e}")
+        logger.error("Error moving file %s to %s: %s", file_path, destination_folder, e)
         raise
 
 
-@cache_function(maxsize=256)
-def copy_file(file_path: str, destination_folder: str) -> Path:
+def move_files(file_paths: Iterable[str], destination_folder: str) -> List[Path]:
+    """
+    Move several files into the same folder.
+
+    The destination folder is ensured and opened once for the whole batch. On systems
+    supporting it, every file is renamed relative to that directory handle, so the
+    destination path is not resolved again per file. Files on another filesystem are
+    copied and removed like in move_file.
+
+    Args:
+        file_paths (Iterable[str]): Paths of the files to be moved.
+        destination_folder (str): Directory where the files should be moved.
+
+    Returns:
+        List[Path]: The new paths of the moved files, in the order of file_paths.
+    """
+    destination_folder = os.fspath(destination_folder)
+    ensure_directory(destination_folder)  # Ensure destination exists, once for all files
+    use_dir_fd = hasattr(os, "O_DIRECTORY") and os.rename in os.supports_dir_fd
+    dir_fd = os.open(destination_folder, os.O_RDONLY | os.O_DIRECTORY) if use_dir_fd else None
+    moved_paths: List[Path] = []
+    try:
+        for file_path in file_paths:
+            file_path = os.fspath(file_path)
+            file_name = os.path.basename(file_path)
+            destination_path = os.path.join(destination_folder, file_name)
+            try:
+                wait_until_file_ready(file_path)
+                try:
+                    if dir_fd is not None:
+                        os.replace(file_path, file_name, dst_dir_fd=dir_fd)
+                    else:
+                        os.replace(file_path, destination_path)
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+                    # Different filesystem: copy and remove the source
+                    _copy_file_in_kernel(file_path, destination_path)
+                    os.unlink(file_path)
+            except Exception as e:
+                logger.error("Error moving file %s to %s: %s", file_path, destination_folder, e)
+                raise
+            logger.debug("Moved file: %s to %s", file_path, destination_path)
+            moved_paths.append(Path(destination_path))
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+    logger.info("Moved %d files to %s", len(moved_paths), destination_folder)
+    return moved_paths
+
+
+def copy_file(file_path: str, destination_folder: str, new_name: Optional[str] = None) -> Path:
     """
     Copy a file to a specified folder.
 
     Args:
         file_path (str): Path to the file to be copied.
         destination_folder (str): Directory where the file should be copied.
+        new_name (Optional[str]): Name of the copy in the destination folder, saves a separate
+            rename_file call. Defaults to the current name.
 
     Returns:
         Path: The new path of the copied file.
     """
     try:
-        file_path = Path(file_path)
-        destination_folder = Path(destination_folder)
-        create_directory(str(destination_folder))  # Ensure destination exists
-        destination_path = destination_folder / file_path.name
-        wait_until_file_ready(str(file_path))
-        shutil.copy(str(file_path), str(destination_path))
-        logger.debug(f"Copied file: {file_path} to {destination_path}")
-        return destination_path
+        # Plain strings internally, a Path is only created for the return value
+        file_path = os.fspath(file_path)
+        destination_folder = os.fspath(destination_folder)
+        ensure_directory(destination_folder)  # Ensure destination exists
+        destination_path = os.path.join(destination_folder, new_name or os.path.basename(file_path))
+        wait_until_file_ready(file_path)
+        _copy_file_in_kernel(file_path, destination_path, copy_metadata=False)
+        logger.debug("Copied file: %s to %s", file_path, destination_path)
+        return Path(destination_path)
     except Exception as e:
-        logger.error(f"Error copying file {file_path} to {destination_folder}: {e}")
+        logger.error("Error copying file %s to %s: %s", file_path, destination_folder, e)
         raise
 
 
-@cache_function(maxsize=256)
+def link_or_copy_file(file_path: str, destination_folder: str, new_name: Optional[str] = None) -> Path:
+    """
+    Put a second name for a file into a folder: a hard link when possible, otherwise a copy.
+
+    A hard link shares the data of the source, no bytes are written. It is only suitable for
+    files which are not modified in place afterwards, since both names see every change.
+    Filesystems without hard links or another filesystem fall back to a copy like copy_file.
+
+    Args:
+        file_path (str): Path to the file.
+        destination_folder (str): Directory where the link or copy should be placed.
+        new_name (Optional[str]): Name in the destination folder. Defaults to the current name.
+
+    Returns:
+        Path: The path of the link or copy.
+    """
+    file_path = os.fspath(file_path)
+    destination_folder = os.fspath(destination_folder)
+    ensure_directory(destination_folder)  # Ensure destination exists
+    destination_path = os.path.join(destination_folder, new_name or os.path.basename(file_path))
+    wait_until_file_ready(file_path)
+    try:
+        os.link(file_path, destination_path)
+        logger.debug("Linked file: %s to %s", file_path, destination_path)
+    except OSError as e:
+        logger.debug("Hard link of %s not possible (%s), copying instead", file_path, e)
+        _copy_file_in_kernel(file_path, destination_path, copy_metadata=False)
+        logger.debug("Copied file: %s to %s", file_path, destination_path)
+    return Path(destination_path)
+
+
 def rename_file(file_path: str, new_name: str) -> Path:
     """
     Rename a file to a new name.
@@ -209,12 +475,54 @@ def rename_file(file_path: str, new_name: str) -> Path:
         Path: The renamed file path.
     """
     try:
-        file_path = Path(file_path)
-        wait_until_file_ready(str(file_path))
-        new_path = file_path.with_name(new_name)
-        file_path.rename(new_path)
-        logger.debug(f"Renamed file: {file_path} to {new_path}")
-        return new_path
+        # Plain strings internally, a Path is only created for the return value
+        file_path = os.fspath(file_path)
+        wait_until_file_ready(file_path)
+        new_path = os.path.join(os.path.dirname(file_path), new_name)
+        os.rename(file_path, new_path)
+        logger.debug("Renamed file: %s to %s", file_path, new_path)
+        return Path(new_path)
     except Exception as e:
-        logger.error(f"Error renaming file {file_path} to {new_name}: {e}")
+        logger.error("Error renaming file %s to %s: %s", file_path, new_name, e)
         raise
+
+
+def append_line(file_path: str, line: str) -> None:
+    """
+    Append a line of text to a file using a single write call.
+
+    The file is opened without a Python buffer in append mode, so the text is in the file
+    when the function returns and the file can be moved or copied right away.
+
+    Args:
+        file_path (str): Path to the file (created if it does not exist).
+        line (str): Text to append, including the line break.
+    """
+    fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+    try:
+        os.write(fd, line.encode("utf-8"))
+    finally:
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def map_file_read_only(file_path: str) -> Iterator[Optional[mmap.mmap]]:
+    """
+    Memory-map a file read-only for the duration of the with block. Reading the map
+    is served from the page cache, no copy of the content is made in Python.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Yields:
+        Optional[mmap.mmap]: The read-only map, None for an empty file (which cannot be mapped).
+    """
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        if os.fstat(fd).st_size == 0:
+            yield None
+            return
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+    finally:
+        os.close(fd)
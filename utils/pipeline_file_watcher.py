@@ -3,17 +3,135 @@ Module providing a file watcher (PipelineFileWatcher) that monitors specified
 directories in a pipeline context for new files and delegates them for processing.
 """
 
-import time
+import os
+import queue
 import threading
-import logging
+import atexit
+import multiprocessing
+import signal
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Set, List, Dict
+from typing import Set, List, Dict, Optional
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer  # inotify, kqueue/FSEvents or ReadDirectoryChangesW
+except ImportError:  # watchdog is optional, without it the watcher falls back to polling
+    FileSystemEventHandler = object
+    Observer = None
 
 # Local imports (adjust as needed for your project)
 from setup import config_setup
 import setup.logging_setup as logging_setup
 from utils import pipeline_handling
 
+# Filesystems on which kernel change notifications are unreliable, so polling is used instead
+NETWORK_FILESYSTEMS: Set[str] = {"nfs", "nfs4", "cifs", "smbfs", "smb3", "9p", "fuse.sshfs"}
+
+
+def is_network_filesystem(path: Path) -> bool:
+    """
+    Checks whether the given path lives on a network filesystem, using /proc/mounts.
+    On systems without /proc/mounts the path is assumed to be local.
+
+    Args:
+        path (Path): Path to check.
+
+    Returns:
+        bool: True if the longest matching mount point has a network filesystem type.
+    """
+    mounts_file = Path("/proc/mounts")
+    if not mounts_file.is_file():
+        return False
+
+    path_str = str(path)
+    best_mount_point, best_fs_type = "", ""
+    for line in mounts_file.read_text().splitlines():
+        fields = line.split()
+        if len(fields) < 3:
+            continue
+        mount_point, fs_type = fields[1], fields[2]
+        if path_str != mount_point and not path_str.startswith(mount_point.rstrip("/") + "/"):
+            continue
+        if len(mount_point) > len(best_mount_point):
+            best_mount_point, best_fs_type = mount_point, fs_type
+    return best_fs_type in NETWORK_FILESYSTEMS
+
+
+def _detect_new_files(current_files: Dict[str, int], known_files: Dict[str, int]) -> List[str]:
+    """
+    Compares two polls of a folder and returns the files which are new or were modified since.
+
+    Args:
+        current_files (Dict[str, int]): File paths of the current poll mapped to their st_mtime_ns.
+        known_files (Dict[str, int]): The same mapping of the previous poll.
+
+    Returns:
+        List[str]: Paths of new or modified files, in the order of current_files.
+    """
+    return [
+        file_path for file_path, mtime in current_files.items()
+        if known_files.get(file_path, -1) < mtime  # File is new or modified
+    ]
+
+
+def _init_cpu_worker() -> None:
+    """
+    Runs once in every worker process of the CPU pool: starts the log listener of the
+    worker and imports the step scripts before its first file.
+    """
+    logging_setup.init_worker_process()
+    pipeline_handling.preload_processor_functions()
+
+
+def _new_cpu_pool() -> ProcessPoolExecutor:
+    """
+    Creates the process pool for the CPU bound steps. Its workers are spawned, not forked:
+    a fork from the running watcher would copy the locks of its other threads in whatever
+    state they are (e.g. the lock of the step script cache), and the log listener thread
+    would be missing in the child.
+
+    Returns:
+        ProcessPoolExecutor: Pool with one worker per CPU.
+    """
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_cpu_worker
+    )
+
+
+class _NewFileHandler(FileSystemEventHandler):
+    """
+    Receives filesystem events for one pipeline subfolder and queues new files
+    for the worker thread of that subfolder. Paths are queued as the plain strings
+    delivered by watchdog, no Path object is created per event.
+    The handler never blocks: watchdog delivers the events of all subfolders from one
+    thread. If the queue is full the file is dropped and overflowed is set, the worker
+    thread then lists the subfolder again once it has caught up.
+    """
+
+    def __init__(self, directory_path: Path, work_queue: "queue.Queue[str]") -> None:
+        super().__init__()
+        self.directory_path = os.fspath(directory_path)
+        self.work_queue = work_queue
+        self.overflowed = threading.Event()
+
+    def queue_file(self, file_path: str) -> None:
+        try:
+            self.work_queue.put_nowait(file_path)
+        except queue.Full:
+            self.overflowed.set()
+
+    def on_created(self, event) -> None:
+        if not event.is_directory:
+            self.queue_file(event.src_path)
+
+    def on_moved(self, event) -> None:
+        # Files moved in from another step or renamed inside this folder
+        if not event.is_directory and os.path.dirname(event.dest_path) == self.directory_path:
+            self.queue_file(event.dest_path)
+
 
 class PipelineFileWatcher:
     """
@@ -21,6 +139,8 @@ class PipelineFileWatcher:
     to the pipeline handling logic for further processing.
     """
 
+    __slots__ = ("config_settings", "logger", "cpu_bound_steps", "cpu_pool", "executor", "max_files_per_step", "_stop")
+
     def __init__(self) -> None:
         """
         Initializes the PipelineFileWatcher by reading configuration settings
@@ -29,105 +149,266 @@ class PipelineFileWatcher:
         self.config_settings = config_setup.get_prod_config()
 
         # Configure a logger for this watcher
-        script_name: str = Path(__file__).stem
-        logs_dir: Path = logging_setup.configure_logs_directory()
-        logfile_path: Path = logs_dir / f"{script_name}.log"
+        self.logger, _ = logging_setup.get_step_logger(__file__)
 
-        self.logger = logging_setup.get_logger(
-            logger_name=script_name,
-            logfile_name=str(logfile_path),
-            console_level=logging.INFO,
-            file_level=logging.DEBUG,
-        )
+        # CPU bound steps are processed in worker processes, all other steps in the watcher threads
+        cpu_bound_steps = self.config_settings["PIPELINE"].get("cpu_bound_steps", "")
+        self.cpu_bound_steps: Set[str] = {step.strip() for step in cpu_bound_steps.split(",") if step.strip()}
+        self.cpu_pool: Optional[ProcessPoolExecutor] = _new_cpu_pool() if self.cpu_bound_steps else None
+
+        # One thread pool for the whole watcher, the folder threads only detect files and hand them over
+        max_workers = self.config_settings["PIPELINE"].getint("max_workers", fallback=os.cpu_count())
+        self.max_files_per_step: int = self.config_settings["PIPELINE"].getint("max_files_per_step", fallback=1)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline-worker")
+        atexit.register(self.executor.shutdown, wait=True)
+
+        # Import the step scripts up front instead of on the first file of each step
+        pipeline_handling.preload_processor_functions()
+        # Warn about step folders missing from a declared step order before files arrive
+        pipeline_handling.check_declared_steps()
+
+        # Set by stop() or on SIGTERM/SIGINT, run() returns once it is set
+        self._stop = threading.Event()
+
+    def stop(self, *_signal_args) -> None:
+        """
+        Asks run() to shut the watcher down. Usable as a signal handler.
+        """
+        self._stop.set()
 
     def run(self) -> None:
         """
-        Launches a thread per subfolder in the base pipeline directory
-        for continuous monitoring. Subfolders are watched concurrently,
-        although files within the same folder are processed sequentially.
+        Watches every subfolder in the base pipeline directory for new files.
+        Kernel change notifications are used when watchdog is installed and the
+        pipeline is on a local filesystem, otherwise a single thread polls all
+        subfolders. Detected files are processed in a shared thread pool, at most
+        max_files_per_step files of the same subfolder at a time.
+        Blocks until stop() is called or SIGTERM/SIGINT is received, then stops
+        watching and waits for the files in processing to finish.
         """
         poll_interval = self.config_settings["PIPELINE"].getint("poll_frequency", fallback=30)
         pipeline_directory = Path(self.config_settings["PIPELINE"].get("pipeline_dir", ".")).resolve()
 
-        self.logger.info(f"Base directory for pipeline: {pipeline_directory}")
-        self.logger.info(f"Polling frequency: {poll_interval} seconds")
+        self.logger.info("Base directory for pipeline: %s", pipeline_directory)
+        self.logger.info("Polling frequency: %s seconds", poll_interval)
 
         subfolders = [
             folder for folder in pipeline_directory.iterdir()
             if folder.is_dir() and not folder.name.startswith(".")
         ]
 
+        observer = None
+        if Observer is not None and not is_network_filesystem(pipeline_directory):
+            observer = self._watch_subfolders(subfolders)
+        else:
+            self.logger.info("Event based watching not available, falling back to polling")
+            threading.Thread(
+                target=self._poll_all,
+                args=(subfolders, poll_interval),
+                name="pipeline-poller",
+                daemon=True
+            ).start()
+            self.logger.info("Started polling thread for %s subfolders", len(subfolders))
+
+        # Signal handlers can only be installed from the main thread
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        # Sleeps without waking up until a shutdown is requested
+        self._stop.wait()
+        self.logger.info("Stopping the Pipeline File Watcher...")
+
+        if observer is not None:
+            observer.stop()
+            observer.join()
+        self.executor.shutdown(wait=True)
+        if self.cpu_pool is not None:
+            self.cpu_pool.shutdown(wait=True)
+
+    def _watch_subfolders(self, subfolders: List[Path]) -> "Observer":
+        """
+        Registers a watchdog observer for each subfolder and starts one worker thread
+        per subfolder that processes the queued files. Each queue holds at most
+        max_queued_files entries, on overflow the subfolder is listed again (see _NewFileHandler).
+        Worker threads are named after their subfolder.
+        Files already present when the watcher starts are queued as new files.
+
+        Args:
+            subfolders (List[Path]): Pipeline step directories to watch.
+
+        Returns:
+            Observer: The started observer, stopped by run() on shutdown.
+        """
+        # Bounded queues: on a burst of new files the paths beyond max_queued_files are not kept,
+        # the files are found again by listing the subfolder once its queue is worked off
+        max_queued_files = self.config_settings["PIPELINE"].getint("max_queued_files", fallback=1000)
+        observer = Observer()
+        handlers: Dict[Path, _NewFileHandler] = {}
         for directory_path in subfolders:
-            thread = threading.Thread(
-                target=self._monitor_subfolder,
-                args=(directory_path, poll_interval),
+            handler = _NewFileHandler(directory_path, queue.Queue(maxsize=max_queued_files))
+            handlers[directory_path] = handler
+            observer.schedule(handler, str(directory_path), recursive=False)
+            threading.Thread(
+                target=self._process_queue,
+                args=(handler, threading.BoundedSemaphore(self.max_files_per_step)),
+                name=f"pipeline-{directory_path.name}",
                 daemon=True
-            )
-            thread.start()
-            self.logger.info(f"Started monitoring thread for: {directory_path}")
+            ).start()
+            self.logger.info("Started watching: %s", directory_path)
+        observer.start()
+
+        # Files which arrived before the observer was started are treated as new
+        for directory_path, handler in handlers.items():
+            with os.scandir(directory_path) as entries:
+                existing_files = [entry.path for entry in entries if entry.is_file()]
+            self.logger.info("Detected %s new files in %s on first run.", len(existing_files), directory_path)
+            for file_path in existing_files:
+                handler.queue_file(file_path)
+        return observer
 
-        # Keep the main thread alive indefinitely
+    def _process_queue(self, handler: _NewFileHandler, folder_slots: threading.BoundedSemaphore) -> None:
+        """
+        Hands the files queued for one subfolder to the thread pool.
+        Files that disappeared before their turn (e.g. reported twice) are skipped.
+        After the queue overflowed, the subfolder is listed once the queue is empty again
+        and the files found are submitted directly.
+
+        Args:
+            handler (_NewFileHandler): Event handler of the subfolder, filling its work_queue.
+            folder_slots (threading.BoundedSemaphore): Limits the files of this subfolder in processing.
+        """
+        work_queue = handler.work_queue
+        in_progress: Set[str] = set()
         while True:
-            time.sleep(3600)
+            file_path = work_queue.get()
+            if os.path.isfile(file_path):
+                self.logger.info("New file detected: %s", file_path)
+                self._submit_file(file_path, folder_slots, in_progress)
+            work_queue.task_done()
+
+            if handler.overflowed.is_set() and work_queue.empty():
+                handler.overflowed.clear()  # before listing, files dropped from now on set it again
+                with os.scandir(handler.directory_path) as entries:
+                    missed_files = [entry.path for entry in entries if entry.is_file()]
+                self.logger.info("Queue of %s overflowed, listed %s files again",
+                                 handler.directory_path, len(missed_files))
+                for missed_file in missed_files:
+                    self._submit_file(missed_file, folder_slots, in_progress)
 
-    def _monitor_subfolder(self, directory_path: Path, poll_interval: int) -> None:
+    def _submit_file(self, file_path: str, folder_slots: threading.BoundedSemaphore,
+                     in_progress: Set[str], blocking: bool = True) -> Optional[Future]:
         """
-        Monitors a single subfolder for new or modified files at a fixed poll interval.
-        Any new or changed file is processed.
+        Submits a file to the thread pool, once a slot of its subfolder is free.
+        A file that is still being processed is not submitted again.
 
         Args:
-            directory_path (Path): Path to the directory being monitored.
-            poll_interval (int): Frequency (in seconds) to check for new files.
+            file_path (str): Path to the new file.
+            folder_slots (threading.BoundedSemaphore): Limits the files of the subfolder in processing.
+            in_progress (Set[str]): Files of the subfolder currently submitted or processed.
+            blocking (bool): Wait for a free slot; otherwise give up if the subfolder is busy.
+
+        Returns:
+            Optional[Future]: Future of the processing, None if the file was already in progress
+            or no slot was free.
         """
-        # known_files: Dict[Path, float] = {f: f.stat().st_mtime for f in directory_path.iterdir() if f.is_file()}
-        known_files: Dict[Path, float] = {}
-        first_run = True  # Flag to track the first execution
+        if file_path in in_progress:
+            return None
+        # blocks the detecting thread while the subfolder is busy, unless blocking is False
+        if not folder_slots.acquire(blocking):
+            return None
+        in_progress.add(file_path)
 
-        while True:
-            try:
-                # Get the current state of files in the directory
-                current_files = {f: f.stat().st_mtime for f in directory_path.iterdir() if f.is_file()}
+        def release(_future: Future) -> None:
+            in_progress.discard(file_path)
+            folder_slots.release()
 
-                # On the first run, treat all existing files as "new"
-                if first_run:
-                    new_or_modified_files = list(current_files.keys())  # All existing files are new
-                    self.logger.info(f"Detected {len(new_or_modified_files)} new files in {directory_path} on first run.")
-                    first_run = False  # Disable first-run logic after initial detection
-                else:
-                    # Detect new or modified files
-                    new_or_modified_files = [
-                        f for f, mtime in current_files.items()
-                        if f not in known_files or known_files[f] < mtime  # File is new or modified
-                    ]
+        future = self.executor.submit(self._process_file_safely, file_path)
+        future.add_done_callback(release)
+        return future
 
-                # Process detected files
-                for file_path in new_or_modified_files:
-                    self.logger.info(f"New or modified file detected: {file_path}")
-                    self._process_file_safely(file_path)
+    def _poll_all(self, subfolders: List[Path], poll_interval: int) -> None:
+        """
+        Polls all subfolders from a single thread. The folders are scanned one after
+        another, spread evenly over the poll interval, so each folder is checked once
+        per poll_interval seconds.
 
-                    # Update the known files dictionary
-                    known_files = current_files.copy()
+        Args:
+            subfolders (List[Path]): Pipeline step directories to poll.
+            poll_interval (int): Frequency (in seconds) to check each folder for new files.
+        """
+        # folder -> {file path -> st_mtime_ns}, None until the first scan of the folder
+        state: Dict[Path, Optional[Dict[str, int]]] = {folder: None for folder in subfolders}
+        folder_slots = {folder: threading.BoundedSemaphore(self.max_files_per_step) for folder in subfolders}
+        in_progress: Dict[Path, Set[str]] = {folder: set() for folder in subfolders}
+        folder_interval = poll_interval / max(len(subfolders), 1)
+
+        while not self._stop.is_set():
+            for directory_path in subfolders:
+                state[directory_path] = self._scan_folder(
+                    directory_path, state[directory_path], folder_slots[directory_path], in_progress[directory_path]
+                )
+                if self._stop.wait(folder_interval):  # returns early on shutdown
+                    break
+
+    def _scan_folder(self, directory_path: Path, known_files: Optional[Dict[str, int]],
+                     folder_slots: threading.BoundedSemaphore, in_progress: Set[str]) -> Optional[Dict[str, int]]:
+        """
+        Scans a single subfolder once and submits new or modified files. On the first
+        scan all existing files are new. A file that cannot be submitted because the
+        subfolder is busy is left out of the result, so the next scan reports it again;
+        the polling thread never waits for one busy subfolder.
 
-            except Exception as e:
-                self.logger.exception(f"Error monitoring {directory_path}: {e}")
+        Args:
+            directory_path (Path): Path to the directory being scanned.
+            known_files (Optional[Dict[str, int]]): Result of the previous scan, None before the first one.
+            folder_slots (threading.BoundedSemaphore): Limits the files of this subfolder in processing.
+            in_progress (Set[str]): Files of this subfolder currently submitted or processed.
+
+        Returns:
+            Optional[Dict[str, int]]: File paths mapped to their st_mtime_ns, to pass to the next scan.
+        """
+        try:
+            # scandir reuses the data of the directory read for is_file(), only the mtime needs a stat per file
+            with os.scandir(directory_path) as entries:
+                current_files = {
+                    entry.path: entry.stat(follow_symlinks=False).st_mtime_ns
+                    for entry in entries if entry.is_file(follow_symlinks=False)
+                }
 
-            finally:
-                time.sleep(poll_interval)
+            if known_files is None:
+                new_or_modified_files = list(current_files)  # All existing files are new
+                self.logger.info("Detected %s new files in %s on first run.", len(new_or_modified_files), directory_path)
+            else:
+                new_or_modified_files = _detect_new_files(current_files, known_files)
 
+            for file_path in new_or_modified_files:
+                self.logger.info("New or modified file detected: %s", file_path)
+                if self._submit_file(file_path, folder_slots, in_progress, blocking=False) is None:
+                    del current_files[file_path]  # retried on the next scan
+            return current_files
 
+        except Exception as e:
+            self.logger.exception("Error monitoring %s: %s", directory_path, e)
+            return known_files
 
-    def _process_file_safely(self, file_path: Path) -> None:
+    def _process_file_safely(self, file_path: "str | os.PathLike[str]") -> None:
         """
         Safely processes a newly detected file by calling pipeline handling logic.
+        Files of CPU bound steps are handed to the process pool and waited for.
         Logs any exceptions rather than halting the entire script.
 
         Args:
-            file_path (Path): Path to the new file.
+            file_path (str | os.PathLike): Path to the new file, normalized to str once here.
         """
+        file_path = os.fspath(file_path)
         try:
-            pipeline_handling.process_file(str(file_path))
-            self.logger.info(f"Successfully processed file: {file_path}")
+            if os.path.basename(os.path.dirname(file_path)) in self.cpu_bound_steps:
+                self.cpu_pool.submit(pipeline_handling.process_file, file_path).result()
+            else:
+                pipeline_handling.process_file(file_path)
+            self.logger.info("Successfully processed file: %s", file_path)
         except FileNotFoundError:
-            self.logger.exception(f"File not found: {file_path}")
+            self.logger.exception("File not found: %s", file_path)
         except Exception:
-            self.logger.exception(f"Error processing file: {file_path}")
\ No newline at end of file
+            self.logger.exception("Error processing file: %s", file_path)
\ No newline at end of file
@@ -1,19 +1,24 @@
 # ==================== Standard library imports ====================
 import os  # Provides operating system dependent functionality
-import logging  # Offers logging operations
+import sys  # Registers the loaded step modules
 import importlib
 import importlib.util  # for the absolut path handling
-import functools
+import inspect  # Checks whether a step function accepts a buffer
+import shutil  # Recursive removal of pipeline storage folders
+import queue  # Work queue of worker_loop
+import threading  # Serializes the loading of step modules
+from concurrent.futures import ThreadPoolExecutor  # Processes a batch of files concurrently
 
 from . import cache_function
 from pathlib import Path  # Simplifies file path operations
-from typing import Optional  # Supplies type hinting for optional parameters
+from typing import Callable, Dict, Iterable, List, Optional, Tuple  # Supplies type hinting for optional parameters
 
 # =================== Local module (project) imports ===================
 from setup import config_setup  # Interfaces with config.ini functionalities
 import setup.logging_setup as logging_setup  # Manages logging configuration
-from utils.file_ops import move_file, copy_file, rename_file, create_directory, \
-    generate_timestamp  # Provides file operations
+from utils import decorators
+from utils.file_ops import move_file, copy_file, link_or_copy_file, ensure_directory, \
+    generate_timestamp, map_file_read_only  # Provides file operations
 
 # Load configuration from config.ini
 config = config_setup.get_prod_config()
@@ -22,40 +27,17 @@ config = config_setup.get_prod_config()
 SCRIPT_NAME: str = Path(__file__).stem
 PROJECT_ROOT: Path = Path(__file__).parent.resolve()
 
-# Build the absolute path for the log file
-logs_dir: Path = logging_setup.configure_logs_directory()
-logfile_path = os.path.join(logs_dir, f"{SCRIPT_NAME}.log")
+# Logger named after the script, writing to logs/<script name>.log
+logger, logfile_path = logging_setup.get_step_logger(__file__)
 
-# Get the logger instance
-logger = logging_setup.get_logger(
-    logger_name=SCRIPT_NAME,
-    logfile_name=logfile_path,
-    console_level=logging.INFO,
-    file_level=logging.DEBUG
-)
-
-
-def log_exceptions_with_args(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except Exception as e:
-            # Log the error with function name and parameter details.
-            logger.error(
-                "Exception in function '%s' with args: %s, kwargs: %s",
-                func.__name__,
-                args,
-                kwargs,
-                exc_info=True  # This logs the traceback as well.
-            )
-            raise  # Re-raise the exception after logging.
 
-    return wrapper
+# Shared decorator, logging exceptions of the wrapped functions to this module's logger
+log_exceptions_with_args = decorators.log_exceptions_with_args(logger)
 
 
 # create global Abs Path Constants from Config
 PROCESSES_DIR: Path = Path(config["PIPELINE"].get("processes_dir", "")).resolve()
+PROCESSES_DIR_STR: str = str(PROCESSES_DIR)  # used to build step script paths without Path objects
 BASE_DIR: Path = Path(config["PIPELINE"].get("base_dir", "")).parent.resolve()
 PIPELINE_DIR: Path = Path(config["PIPELINE"].get("pipeline_dir", "")).resolve()
 PIPELINE_STORAGE_DIR: Path = Path(config["PIPELINE"].get("pipeline_storage_dir", "")).resolve()
@@ -65,13 +47,74 @@ ERROR_DIR: Path = Path(config["PIPELINE"].get("error_dir", "")).resolve()
 # get function parameter from Config
 PROCESS_FILE_PREFIX: str = config["PIPELINE"].get("process_file_prefix", "pipeline_step_")
 PROCESS_FILE_FUNCTION_NAME: str = config["PIPELINE"].get("process_file_function_name", "process_this")
+MIRROR_ON_SUCCESS: bool = config["PIPELINE"].getboolean("mirror_on_success", fallback=True)
+# Declared step order, empty to order the step folders alphabetically
+PIPELINE_STEPS: Tuple[str, ...] = tuple(
+    step.strip() for step in config["PIPELINE"].get("steps", "").split(",") if step.strip()
+)
+
+
+@cache_function(maxsize=1)
+def _next_step_names(pipeline_dir_mtime_ns: int) -> Dict[str, str]:
+    """
+    Lists the step folders of the pipeline and maps each step to the next one alphabetically.
+    The result is cached for one mtime of the pipeline directory, adding or removing a
+    step folder changes the mtime and the steps are listed again.
+
+    Args:
+        pipeline_dir_mtime_ns (int): st_mtime_ns of PIPELINE_DIR, the cache key.
+
+    Returns:
+        Dict[str, str]: Step folder name -> name of the following step folder (the last step has no entry).
+    """
+    with os.scandir(PIPELINE_DIR) as entries:
+        steps = sorted(entry.name for entry in entries if entry.is_dir(follow_symlinks=False))
+    logger.debug("pipeline steps %s", steps)
+    return dict(zip(steps, steps[1:]))
+
+
+@cache_function(maxsize=1)
+def _configured_next_steps(steps: Tuple[str, ...]) -> Dict[str, str]:
+    """
+    Maps each step of the declared step order to the next one.
+
+    Args:
+        steps (Tuple[str, ...]): Step folder names in pipeline order.
+
+    Returns:
+        Dict[str, str]: Step folder name -> name of the following step folder (the last step has no entry).
+    """
+    return dict(zip(steps, steps[1:]))
+
+
+def check_declared_steps() -> List[str]:
+    """
+    Compares the steps declared in config.ini with the step folders of the pipeline and logs a
+    warning for each folder missing from the declaration (its files would end as finished after
+    their step) and for each declared step without a folder. Nothing to check without declared steps.
+
+    Returns:
+        List[str]: Names of the step folders which are not declared.
+    """
+    if not PIPELINE_STEPS:
+        return []
+    with os.scandir(PIPELINE_DIR) as entries:
+        step_folders = sorted(entry.name for entry in entries
+                              if entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."))
+    undeclared = [step for step in step_folders if step not in PIPELINE_STEPS]
+    for step in undeclared:
+        logger.warning("step folder '%s' is not in the declared steps, its files do not move on to another step", step)
+    for step in PIPELINE_STEPS:
+        if step not in step_folders:
+            logger.warning("declared step '%s' has no folder in %s", step, PIPELINE_DIR)
+    return undeclared
 
 
-@cache_function(maxsize=256)
 @log_exceptions_with_args
 def get_next_dir(original_file_of_this_step_path: str) -> Optional[str]:
     """
-    Get the next folder alphabetically in the pipeline.
+    Get the next folder in the pipeline: the next one of the steps declared in config.ini,
+    or, without a declared order, the next folder alphabetically.
 
     Args:
         original_file_of_this_step_path (str): A file in the path of the current pipeline folder.
@@ -80,71 +123,142 @@ def get_next_dir(original_file_of_this_step_path: str) -> Optional[str]:
         Optional[str]: The path to the next folder in the pipeline, or None
                        if the current folder is the last one.
     """
-    # Get all sibling folders in alphabetical order
-    sibling_dir = sorted(
-        folder
-        for folder in os.listdir(PIPELINE_DIR)
-        if os.path.isdir(os.path.join(PIPELINE_DIR, folder))
-    )
-    logger.debug(f"sibling_dir {sibling_dir}")
-
     # Retrieve the parent directory name from the full file path
-    current_dir_name = Path(original_file_of_this_step_path).parent.name
-    logger.debug(f"current_dir_name {current_dir_name}")
-
-    # Get the current folder's index
-    current_index = sibling_dir.index(current_dir_name)
-    logger.debug(f"current_index {current_index}")
+    current_dir_name = os.path.basename(os.path.dirname(os.fspath(original_file_of_this_step_path)))
+    if PIPELINE_STEPS:
+        next_dir_name = _configured_next_steps(PIPELINE_STEPS).get(current_dir_name)  # no filesystem access
+        if current_dir_name not in PIPELINE_STEPS:
+            logger.warning("step '%s' is not in the declared steps, treating it as the last step", current_dir_name)
+    else:
+        next_dir_name = _next_step_names(os.stat(PIPELINE_DIR).st_mtime_ns).get(current_dir_name)
+    logger.debug("current_dir_name %s, next_dir_name %s", current_dir_name, next_dir_name)
 
     # Return the next folder’s path if it exists, otherwise None
-    if current_index + 1 < len(sibling_dir):
-        logger.debug(f"return {str(PIPELINE_DIR / sibling_dir[current_index + 1])}")
-        return str(PIPELINE_DIR / sibling_dir[current_index + 1])
-    return None
+    if next_dir_name is None:
+        return None
+    return str(PIPELINE_DIR / next_dir_name)
+
+
+@cache_function(maxsize=128)
+def _load_processor(step_name: str, process_file_path: str, mtime_ns: int) -> Optional[Callable]:
+    """
+    Imports the step script at process_file_path and resolves its step function. Cached per
+    (step, path, mtime), so a script is executed and checked once per version; an edited
+    script gets a new entry and is loaded again. Failed imports are not cached.
+
+    Args:
+        step_name (str): Name of the step, used for logging.
+        process_file_path (str): Path of the step script.
+        mtime_ns (int): st_mtime_ns of the step script, part of the cache key.
+
+    Returns:
+        Optional[Callable]: The step function, None if the script has no callable of that name.
+    """
+    module_name = os.path.basename(process_file_path)[:-len(".py")]
+    spec = importlib.util.spec_from_file_location(module_name, process_file_path)
+    logger.debug("spec (=processor module) name '%s' origin %s loaded for step %s", spec.name, spec.origin, step_name)
+    module = importlib.util.module_from_spec(spec)  # import step process file with target function
+    # Registered before executing, so imports of the step module itself resolve to this module
+    sys.modules[spec.name] = module
+    try:
+        spec.loader.exec_module(
+            module)  # "execute" the module to get all attributes and functions -  this doesn't start any function of the module, just initiates it
+    except BaseException:
+        sys.modules.pop(spec.name, None)
+        raise
+    func = getattr(module, PROCESS_FILE_FUNCTION_NAME, None)
+    logger.debug("module %s with attribs %s loaded", module, func)
+    if func is None:
+        logger.error("the pipeline process '%s' does not have a function named '%s'.", step_name, PROCESS_FILE_FUNCTION_NAME)
+        return None
+    if not callable(func):
+        logger.error("Attribute %s exists but is not callable.", PROCESS_FILE_FUNCTION_NAME)
+        return None
+    return func
+
+
+# lru_cache does not stop two threads from loading the same script at once, so lookups are serialized
+_processor_lock = threading.Lock()
 
 
-@cache_function(maxsize=256)
 @log_exceptions_with_args
-def get_processor_function(step_name: str):
+def get_processor_function(step_name: str) -> Optional[Callable]:
     """
     Dynamically imports the module for the given step name from the directory
-    specified in the config, then returns the 'process_file' function.
+    specified in the config, then returns its step function.
+
+    Each version of a step script is loaded and checked once per process: later calls only
+    stat the script and return the cached function (see _load_processor), and a changed
+    script is picked up without restarting. Call _load_processor.cache_clear() to force a reload.
 
     Args:
         step_name (str): Name of the step/module to import.
 
     Returns:
-        function: The 'process_file' function in the imported module.
+        Optional[Callable]: The step function of the imported module, None if the module
+        has no callable named PROCESS_FILE_FUNCTION_NAME (logged when it is loaded).
 
     Raises:
         ImportError: If the module or function can't be found.
     """
+    # getting process file name and create path
+    process_file_name = f"{PROCESS_FILE_PREFIX}{step_name}.py"
+    process_file_path = os.path.join(PROCESSES_DIR_STR, process_file_name)
+
     try:
-        # getting process file name and create path
-        process_file_name = f"{PROCESS_FILE_PREFIX}{step_name}.py"
-        process_file_path = Path(PROCESSES_DIR) / Path(process_file_name)
-        logger.debug(f"look for {process_file_name} in {PROCESSES_DIR}")
+        mtime_ns = os.stat(process_file_path).st_mtime_ns
+        with _processor_lock:
+            return _load_processor(step_name, process_file_path, mtime_ns)
+    except (ImportError, FileNotFoundError) as err:
+        # Handle or log the exception as needed
+        logger.error("Failed to import %s from module '%s': %s", PROCESS_FILE_FUNCTION_NAME, process_file_name, err)
+        raise ImportError(f"Processor function {step_name} not found: {err}") from err
+
 
+def preload_processor_functions() -> Dict[str, Callable]:
+    """
+    Imports every step script in the processes directory once, so the first file of
+    each step does not pay for locating, reading and compiling its script.
+    The functions end up in the cache of _load_processor; worker processes
+    forked afterwards inherit them. Scripts that fail to import are skipped, they
+    are retried (and fail again) when a file of their step arrives.
+
+    Returns:
+        Dict[str, Callable]: Step name -> step function of the loaded processor module.
+    """
+    processors: Dict[str, Callable] = {}
+    with os.scandir(PROCESSES_DIR_STR) as entries:
+        step_names = sorted(
+            entry.name[len(PROCESS_FILE_PREFIX):-len(".py")] for entry in entries
+            if entry.is_file() and entry.name.startswith(PROCESS_FILE_PREFIX) and entry.name.endswith(".py")
+        )
+    for step_name in step_names:
         try:
-            spec = importlib.util.spec_from_file_location(PROCESS_FILE_FUNCTION_NAME, str(process_file_path))
-            logger.debug(f"spec (=processor module) name '{spec.name}' origin {spec.origin} loaded")
-            module = importlib.util.module_from_spec(spec) # import step process file with target function
-            spec.loader.exec_module(
-                module)  # "execute" the module to get all attributes and functions -  this doesn't start any function of the module, just initiates it
-            module_attribs = getattr(module, PROCESS_FILE_FUNCTION_NAME, None)
-            logger.debug(f"module {module} with attribs {module_attribs} loaded")
-        except (ImportError, ModuleNotFoundError) as err:
-            # Handle or log the exception as needed
-            logger.error(f"Failed to import {PROCESS_FILE_FUNCTION_NAME} from module '{process_file_name}': {err}")
-            raise
+            func = get_processor_function(step_name)
+        except ImportError:
+            continue  # already logged by get_processor_function
+        if func is not None:
+            processors[step_name] = func
+    logger.info("Preloaded %d processor modules from %s", len(processors), PROCESSES_DIR_STR)
+    return processors
 
-        if module is None:
-            raise AttributeError(f"Module '{process_file_name}' has no attribute '{PROCESS_FILE_FUNCTION_NAME}'")
 
-        return module
+@cache_function(maxsize=None)
+def accepts_buffer(func) -> bool:
+    """
+    Checks once per step function whether it takes a 'buffer' argument. Such functions
+    are called with a read-only memory map of the working file in addition to its path.
 
-    except (ImportError, AttributeError) as e:
-        raise ImportError(f"Processor function {step_name} not found: {e}") from e
+    Args:
+        func: The step function.
+
+    Returns:
+        bool: True if the function has a parameter named 'buffer'.
+    """
+    try:
+        return "buffer" in inspect.signature(func).parameters
+    except (TypeError, ValueError):  # builtins or other callables without a signature
+        return False
 
 
 @log_exceptions_with_args
@@ -158,15 +272,30 @@ def create_working_dir(dir_path: str) -> str:  # not really used
     Returns:
         str: The path to the working directory.
     """
-    working_dir: str = str(Path(dir_path) / "working")
-    Path(working_dir).mkdir(parents=True, exist_ok=True)
+    working_dir: str = os.path.join(dir_path, "working")
+    ensure_directory(working_dir)
     return working_dir
 
 
-@cache_function(maxsize=256)
+def error_file_name(file_path: str, marker: str) -> str:
+    """
+    Builds the name a file gets when it is set aside after an error: the marker
+    is inserted between stem and suffix, e.g. "scan.pdf" -> "scan_causing_error.pdf".
+
+    Args:
+        file_path (str): The file or its name, only the name is used.
+        marker (str): Error marker such as "causing_error" or "work_error".
+
+    Returns:
+        str: The new file name.
+    """
+    stem, suffix = os.path.splitext(os.path.basename(file_path))
+    return f"{stem}_{marker}{suffix}"
+
+
 @log_exceptions_with_args
 def reflect_to_pipeline_storage(pipeline_step_root_dir: str, path_of_file_to_be_refelected: str, do_i_move_file: bool = False,
-                                result: bool = True) -> None:
+                                result: bool = True, timestamp: Optional[str] = None) -> None:
     """
     Reflect a file to the pipeline storage system while maintaining its provenance and optionally moving
     or copying the file with a new timestamped file name.
@@ -180,8 +309,11 @@ def reflect_to_pipeline_storage(pipeline_step_root_dir: str, path_of_file_to_be_
             Determines whether the file should be moved (`True`) or copied (`False`).
             Default is `False`.
         result: bool, optional
-            Indicates whether to proceed with the reflection process.
-            When `False`, the function skips all operations. Default is `True`.
+            Indicates whether the step succeeded. When `False`, the file is copied
+            (never moved) as `<stem>_causing_error<suffix>`, without a timestamp. Default is `True`.
+        timestamp: str, optional
+            Timestamp for the new file name, e.g. shared by all files reflected for one processed file.
+            Default is `None`, a new timestamp is generated.
 
     Returns:
         None
@@ -190,166 +322,209 @@ def reflect_to_pipeline_storage(pipeline_step_root_dir: str, path_of_file_to_be_
         This function does not explicitly raise exceptions, but errors related to file operations,
         such as FileNotFoundError or PermissionError, may propagate from the underlying utilities.
     """
-    if not result:
-        logger.debug("Reflection skipped because 'result' is False.")
-        return
-
-    original_path: Path = Path(path_of_file_to_be_refelected)
-    if not original_path.is_file():
-        logger.warning(f"reflect_to_pipeline_storage file does not exist {path_of_file_to_be_refelected}")
+    # Plain strings with os.path, no Path objects are created per reflected file
+    original_path: str = os.fspath(path_of_file_to_be_refelected)
+    if not os.path.isfile(original_path):
+        logger.warning("reflect_to_pipeline_storage file does not exist %s", path_of_file_to_be_refelected)
         return
 
     # 1) Extract the “parent” directory name from the original file’s path
     #    (this helps capture dynamic provenance).
-    parent_name: str = Path(pipeline_step_root_dir).name  # e.g., "step3" from ".../step3/processed/"
-    logger.debug(f"parent_name {parent_name}")
+    parent_name: str = os.path.basename(os.path.normpath(pipeline_step_root_dir))  # e.g., "step3" from ".../step3/"
+    logger.debug("parent_name %s", parent_name)
 
     # 2) Prepare the pipeline storage subdirectory: we mirror the pipeline structure
     #    by creating a subdir for the current_dir.
     #    (Replace this path with your actual config lookup if needed.)
-    pipeline_storage_base: Path = PIPELINE_STORAGE_DIR  # from config
-    logger.debug(f"pipeline_storage_base {pipeline_storage_base}")
+    pipeline_storage_base: str = os.fspath(PIPELINE_STORAGE_DIR)  # from config
+    logger.debug("pipeline_storage_base %s", pipeline_storage_base)
 
-    pipeline_storage_subdir: Path = pipeline_storage_base / parent_name
-    logger.debug(f"pipeline_storage_subdir {pipeline_storage_subdir}")
+    pipeline_storage_subdir: str = os.path.join(pipeline_storage_base, parent_name)
+    logger.debug("pipeline_storage_subdir %s", pipeline_storage_subdir)
+    # The subdirectory is created by move_file/copy_file, once per process (see file_ops.ensure_directory)
 
-    create_directory(str(pipeline_storage_subdir))
+    if not result:
+        # Copied directly under its error name, no copy followed by a rename
+        final_path: Path = copy_file(original_path, pipeline_storage_subdir,
+                                     new_name=error_file_name(original_path, "causing_error"))
+        logger.debug("Reflected error file into pipeline storage: %s", final_path)
+        return
 
     # 3) Include both the parent directory name and a timestamp in the new file name.
-    file_status_derived_of_path: str = Path(path_of_file_to_be_refelected).parent.name
+    original_dir, original_name = os.path.split(original_path)
+    file_status_derived_of_path: str = os.path.basename(original_dir)
     status = file_status_derived_of_path if file_status_derived_of_path != parent_name else ""
 
-    timestamp_str: str = generate_timestamp()
-    new_file_name: str = f"{original_path.stem}_{status}_{timestamp_str}{original_path.suffix}"
-    logger.debug(f"Generated new file name: {new_file_name}")
-
-    # 4) copy the file into the pipeline storage subdirectory
-    #    and assign a temporary name identical to the original.
+    timestamp_str: str = timestamp if timestamp is not None else generate_timestamp()
+    stem, suffix = os.path.splitext(original_name)
+    new_file_name: str = f"{stem}_{status}_{timestamp_str}{suffix}"
+    logger.debug("Generated new file name: %s", new_file_name)
 
+    # 4) move or link the file into the pipeline storage subdirectory,
+    #    directly under its new name including subdir + timestamp (no separate rename).
+    #    Files kept in the pipeline are only moved on afterwards, never changed in place,
+    #    so the storage entry can share their data (copied if hard links are not possible).
     if do_i_move_file:
-        storage_file_path: Path = move_file(str(original_path), str(pipeline_storage_subdir))
+        final_path: Path = move_file(original_path, pipeline_storage_subdir, new_name=new_file_name)
     else:
-        storage_file_path: Path = copy_file(str(original_path), str(pipeline_storage_subdir))
+        final_path: Path = link_or_copy_file(original_path, pipeline_storage_subdir, new_name=new_file_name)
+    logger.debug("Reflected file into pipeline storage: %s", final_path)
 
-    # 5) Rename the moved file to include subdir + timestamp
-    final_path: Path = rename_file(str(storage_file_path), new_file_name)
-    logger.debug(f"Reflected file into pipeline storage: {final_path}")
 
-
-@cache_function(maxsize=256)
 @log_exceptions_with_args
 def process_file(file_path: str) -> None:
     """
     Processes a file through the pipeline with error handling and database mirroring.
+    Step functions with a 'buffer' parameter also get a read-only memory map of the working file.
     """
 
-    if not Path(file_path).exists():
-        logger.error(f"File does not exist: {file_path}")
-        raise FileNotFoundError(f"The file {file_path} does not exist!")
+    # Plain strings with os.path, the step function gets the only Path object of the file
+    file_path = os.fspath(file_path)
+    current_dir, file_name = os.path.split(file_path)
 
     # Identify current directory and define subfolders
-    current_dir_path = Path(file_path).parent
-    logger.debug(f"process_file -> current_dir_path {current_dir_path}")
-    working_dir = current_dir_path / "working"
-    processed_dir = current_dir_path / "processed"
-    error_dir = current_dir_path / "error"
+    current_dir_name = os.path.basename(current_dir)
+    logger.debug("process_file -> current_dir_path %s", current_dir)
+    working_dir = os.path.join(current_dir, "working")
+    processed_dir = os.path.join(current_dir, "processed")
+    error_dir = os.path.join(current_dir, "error")
 
-    # Create subdirectories if needed
-    working_dir.mkdir(exist_ok=True)
-    processed_dir.mkdir(exist_ok=True)
-    error_dir.mkdir(exist_ok=True)
+    # Create subdirectories if needed, once per process (see file_ops.ensure_directory)
+    ensure_directory(working_dir)
+    ensure_directory(processed_dir)
+    ensure_directory(error_dir)
 
-    # Extract just the file name
-    file_name = Path(file_path).name
+    # Derive the paths of the file in the subfolders once
+    working_file_path = os.path.join(working_dir, file_name)
+    processed_file_path = os.path.join(processed_dir, file_name)
 
     try:
         # 1) Copy the file into the "working" folder
-        #    Pass only the folder to "copy_file"
-        copy_file(file_path, str(working_dir))
-
-        # 2) Build the file’s new path after copying
-        working_file_path = working_dir / file_name
+        #    Pass only the folder to "copy_file". A missing file fails here, no separate existence check.
+        try:
+            copy_file(file_path, working_dir)
+        except FileNotFoundError:
+            logger.error("File does not exist: %s", file_path)
+            raise
 
-        # 3) Retrieve & execute the appropriate processor
-        logger.debug(f"processing {file_name} in {working_file_path}")
-        processor_module = get_processor_function(
-            current_dir_path.name)  # look for module using the current step dir name
-        logger.debug(f"found processor {processor_module}")
+        # 2) Retrieve & execute the appropriate processor
+        logger.debug("processing %s in %s", file_name, working_file_path)
+        func_to_call = get_processor_function(current_dir_name)  # look for the step function using the current step dir name
+        logger.debug("found processor %s", func_to_call)
 
-        # execute function from processor_module
+        # execute the step function, a missing or not callable one was logged when its module was loaded
         result = False
-        if processor_module:
-            if hasattr(processor_module, PROCESS_FILE_FUNCTION_NAME):
-                # Retrieve the function object
-                func_to_call = getattr(processor_module, PROCESS_FILE_FUNCTION_NAME)
-                # Optionally, check if it is callable
-                if callable(func_to_call):
-                    try:
-                        # Execute the function; pass any parameters as needed.
-                        result = func_to_call(working_file_path)  # or func_to_call(args...) if parameters are required
-                        processed_file_path = processed_dir / file_name  # create the processed file path
-                    except Exception as e:
-                        print(f"An error occurred while executing {PROCESS_FILE_FUNCTION_NAME}: {e}")
+        if func_to_call is None:
+            logger.error("no processor function for step '%s'", current_dir_name)
+        else:
+            try:
+                if accepts_buffer(func_to_call):
+                    # Opt-in: the step reads the content from the page cache instead of the disk
+                    with map_file_read_only(working_file_path) as buffer:
+                        result = func_to_call(Path(working_file_path), buffer=buffer)
                 else:
-                    print(f"Attribute {PROCESS_FILE_FUNCTION_NAME} exists but is not callable.")
-            else:
-                print(
-                    f"the pipeline process '{current_dir_path.name}' does not have a function named '{PROCESS_FILE_FUNCTION_NAME}'.")
-
-        # 4) Reflect success/failure in pipeline storage
-        reflect_to_pipeline_storage(str(current_dir_path), str(file_path), do_i_move_file=True,
-                                    result=result)  # copy step original to pipeline_storage
-        reflect_to_pipeline_storage(str(current_dir_path), str(processed_file_path), do_i_move_file=False,
-                                    result=result)  # copy step result to pipeline_storage
+                    result = func_to_call(Path(working_file_path))
+            except Exception as e:
+                logger.exception("An error occurred while executing %s: %s", PROCESS_FILE_FUNCTION_NAME, e)
 
         if result:
+            # 3) Reflect the success in pipeline storage, original and result share one timestamp
+            #    (failures are reflected below under their error names)
+            if MIRROR_ON_SUCCESS:
+                timestamp = generate_timestamp()
+                reflect_to_pipeline_storage(current_dir, file_path, do_i_move_file=True,
+                                            timestamp=timestamp)  # copy step original to pipeline_storage
+                reflect_to_pipeline_storage(current_dir, processed_file_path, do_i_move_file=False,
+                                            timestamp=timestamp)  # copy step result to pipeline_storage
+            else:
+                # Not stored: the original is done with and only the result moves on
+                os.unlink(file_path)
+                logger.info("Step %s succeeded for %s, not mirrored to pipeline storage", current_dir_name, file_name)
+
             # If processing succeeded, move to next or "processed" folder
-            next_dir = get_next_dir(str(file_path))
+            next_dir = get_next_dir(file_path)
             if next_dir:
-                move_file(str(processed_file_path), str(next_dir))
+                move_file(processed_file_path, next_dir)
             else:
-                move_file(str(processed_file_path), str(processed_dir))
+                move_file(processed_file_path, processed_dir)
         else:
             # If processing failed, move to "error" folder (possibly renaming)
             # move_working file
             try:
-                move_file(str(working_file_path), str(error_dir))
-                # Create new name, including "_triggered_error" before the extension
-                error_file_path = error_dir / file_name # path of file in error dir
-    
-                new_name = f"{error_file_path.stem}_working_triggered_error{error_file_path.suffix}"
-                renamed_path = Path(error_file_path).with_name(new_name)
-                error_file_path= error_file_path.rename(renamed_path)
-                logger.info(f"Renamed file to {error_file_path}")
+                # Move under a new name, including "_triggered_error" before the extension
+                new_name = error_file_name(file_name, "working_triggered_error")
+                error_file_path = move_file(working_file_path, error_dir, new_name=new_name)
+                logger.info("Renamed file to %s", error_file_path)
     
                 # error_file_path = str(error_dir)
     
-                reflect_to_pipeline_storage(str(current_dir_path), str(error_file_path), do_i_move_file=True,
+                reflect_to_pipeline_storage(current_dir, str(error_file_path), do_i_move_file=True,
                                             result=True)  # copy step result to pipeline_storage
             except Exception as e:
-                logger.error(f"Unexpected error while processing file {working_file_path}: {e}")
+                logger.error("Unexpected error while processing file %s: %s", working_file_path, e)
 
             try:
-                move_file(str(file_path), str(error_dir))
-                # Create new name, including "_triggered_error" before the extension
-                error_file_path = error_dir / file_name  # path of file in error dir
-
-                new_name = f"{error_file_path.stem}_original_triggered_error{error_file_path.suffix}"
-                renamed_path = Path(error_file_path).with_name(new_name)
-                error_file_path = error_file_path.rename(renamed_path)
-                logger.info(f"Renamed file to {error_file_path}")
+                # Move under a new name, including "_triggered_error" before the extension
+                new_name = error_file_name(file_name, "original_triggered_error")
+                error_file_path = move_file(file_path, error_dir, new_name=new_name)
+                logger.info("Renamed file to %s", error_file_path)
 
-                reflect_to_pipeline_storage(str(current_dir_path), str(error_file_path), do_i_move_file=True, result=True)
+                reflect_to_pipeline_storage(current_dir, str(error_file_path), do_i_move_file=True, result=True)
             except Exception as e:
-                        logger.error(f"Unexpected error while processing file {working_file_path}: {e}")
+                        logger.error("Unexpected error while processing file %s: %s", working_file_path, e)
 
     except Exception as e:
+            if not os.path.exists(file_path):
+                raise  # the original is gone (or never existed), there is nothing to move to "error"
             # On any exception, log and move the original file to "error"
-            logger.error(f"Unexpected error while processing file {file_path}: {e}")
-            move_file(file_path, str(error_dir / f"{file_name}.err"))
+            logger.error("Unexpected error while processing file %s: %s", file_path, e)
+            move_file(file_path, os.path.join(error_dir, f"{file_name}.err"))
+
+
+def process_files(file_paths: Iterable[str], max_workers: int = 8) -> List[str]:
+    """
+    Processes a batch of files concurrently with process_file. The work per file is mostly
+    waiting for the disk, so threads are enough; choose max_workers to match the storage
+    (e.g. 2-4 for spinning disks, 16 or more for NVMe).
+
+    Args:
+        file_paths (Iterable[str]): Files to process, each is processed like a single file.
+        max_workers (int): Number of files processed at the same time.
+
+    Returns:
+        List[str]: The files whose processing raised (already logged by process_file).
+    """
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline-batch") as executor:
+        # Pairs instead of a dict keyed by path, a path given twice must not hide the failure of its first run
+        futures = [(os.fspath(file_path), executor.submit(process_file, file_path)) for file_path in file_paths]
+    return [file_path for file_path, future in futures if future.exception() is not None]
+
+
+def worker_loop(work_queue: "queue.Queue[str]", stop_event: threading.Event, poll_timeout: float = 0.5) -> None:
+    """
+    Long-lived worker: processes the file paths put into work_queue one after the other
+    until stop_event is set. Run it in one or more threads sharing the queue; all caches
+    (step functions, step order, created directories) stay warm across the files.
+
+    Args:
+        work_queue (queue.Queue[str]): Queue of file paths to process.
+        stop_event (threading.Event): Ends the loop once set, checked at least every poll_timeout seconds.
+        poll_timeout (float): Seconds to wait for a file before checking stop_event again.
+    """
+    get = work_queue.get  # looked up once for the whole loop
+    while not stop_event.is_set():
+        try:
+            file_path = get(timeout=poll_timeout)
+        except queue.Empty:
+            continue
+        try:
+            process_file(file_path)
+        except Exception:
+            pass  # already logged by process_file, the worker goes on with the next file
+        finally:
+            work_queue.task_done()
 
 
-@cache_function(maxsize=256)
 @log_exceptions_with_args
 def handle_processing_error(current_dir: str, original_file: str, working_file: str) -> None:
     """
@@ -357,7 +532,8 @@ def handle_processing_error(current_dir: str, original_file: str, working_file:
     updating the pipeline storage to reflect these changes. This facilitates
     tracking and debugging of files that encountered processing issues. The
     modified files are properly renamed, and their updated names are logged for
-    further inspection.
+    further inspection. The original file is moved into the "error" folder of the
+    step, so the watcher does not pick it up again as a new file.
 
     :param current_dir: The directory path where the pipeline operates.
     :type current_dir: str
@@ -369,19 +545,21 @@ def handle_processing_error(current_dir: str, original_file: str, working_file:
     :rtype: None
     """
     # Append `_work_error` to the working file
-    work_error_file = str(
-        Path(working_file).with_name(f"{Path(working_file).stem}_work_error{Path(working_file).suffix}"))
-    os.rename(working_file, work_error_file)
+    work_error_file = os.path.join(os.path.dirname(working_file), error_file_name(working_file, "work_error"))
+    os.replace(working_file, work_error_file)  # also replaces a leftover of an earlier failed run
 
-    # Append `_causing_error` to the original file and reflect in the database
-    causing_error_file = str(
-        Path(original_file).with_name(f"{Path(original_file).stem}_causing_error{Path(original_file).suffix}"))
-    reflect_to_pipeline_storage(current_dir, f"{Path(original_file).stem}_causing_error{Path(original_file).suffix}")
+    # Reflect the original as failed in the database (stored as `<stem>_causing_error<suffix>`),
+    # then move it into the "error" folder under the same name. Renamed inside the step folder
+    # it would be queued again by the watcher, and fail again.
+    reflect_to_pipeline_storage(current_dir, original_file, result=False)
+    error_dir = os.path.join(current_dir, "error")
+    ensure_directory(error_dir)
+    causing_error_file = os.path.join(error_dir, error_file_name(original_file, "causing_error"))
+    os.replace(original_file, causing_error_file)
 
-    logger.info(f"Processing error detected: {causing_error_file}, {work_error_file}")
+    logger.info("Processing error detected: %s, %s", causing_error_file, work_error_file)
 
 
-@cache_function(maxsize=256)
 @log_exceptions_with_args
 def purge_pipeline_storage():
     """
@@ -400,20 +578,18 @@ def purge_pipeline_storage():
         raise FileNotFoundError(f"Pipeline storage directory '{PIPELINE_STORAGE_DIR}' does not exist.")
 
     try:
-        # Loop through and delete all files and folders in the pipeline storage directory
-        for item in pipeline_storage_path.iterdir():
-            if item.is_file():
-                item.unlink()  # Remove file
-            elif item.is_dir():
-                # Recursively delete directory
-                for sub_item in item.iterdir():
-                    if sub_item.is_file():
-                        sub_item.unlink()
-                    elif sub_item.is_dir():
-                        sub_item.rmdir()
-                item.rmdir()  # Remove the directory itself
-
-        logger.info(f"Pipeline storage directory '{PIPELINE_STORAGE_DIR}' has been purged.")
+        # Loop through and delete all files and folders in the pipeline storage directory,
+        # the entry types come from the directory listing itself, without a stat per entry
+        with os.scandir(pipeline_storage_path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)  # Remove the directory with everything below it, at any depth
+                else:
+                    os.unlink(entry.path)  # Remove file (or link, without following it)
+
+        # The removed directories must be created again by the next move or copy into them
+        ensure_directory.cache_clear()
+        logger.info("Pipeline storage directory '%s' has been purged.", PIPELINE_STORAGE_DIR)
     except Exception as e:
-        logger.error(f"Error while purging pipeline storage: {e}")
+        logger.error("Error while purging pipeline storage: %s", e)
         raise